@@ -2,7 +2,10 @@ import streamlit as st
 import sys
 sys.path.append('src')
 
-from qdrant_utils import get_client
+from qdrant_utils import get_client, get_search_params
+from ranking import INVESTMENT_WEIGHTS, SEMANTIC_WEIGHT, candidate_limit, rerank
+from search_filters import FilterError, build_filter, filter_spec
+from payload_utils import DISPLAY_FIELDS, resolve_ar_urls
 from qdrant_client.models import Filter, FieldCondition, MatchValue
 import pandas as pd
 from streamlit.components.v1 import html
@@ -10,8 +13,8 @@ from streamlit.components.v1 import html
 # Cache the model and client to avoid reloading
 @st.cache_resource
 def load_model():
-    from vectorize import get_embedding
-    return get_embedding
+    from vectorize import get_query_embedding
+    return get_query_embedding
 
 @st.cache_resource
 def load_qdrant_client():
@@ -21,32 +24,42 @@ get_embedding = load_model()
 client = load_qdrant_client()
 
 # Search function
-def search_products(query: str, collection: str, top_k: int):
+def search_products(query: str, collection: str, top_k: int, filters=None, investment_weights=None,
+                    semantic_weight=None):
     if not query.strip():
         st.warning("Please enter a search query")
         return []
     
     try:
         vector = get_embedding(query)
+        params = get_search_params(client, collection)
+        query_filter = build_filter(filters)
+        # Investment mode: over-fetch, then rerank by semantic + investment score.
+        limit = candidate_limit(top_k) if investment_weights else top_k
+        with_payload = DISPLAY_FIELDS + list(investment_weights or [])
         # Use search() API which returns ScoredPoint with full payload
         try:
             results = client.search(
                 collection_name=collection,
                 query_vector=vector,
-                limit=top_k
+                limit=limit,
+                query_filter=query_filter,
+                search_params=params,
+                with_payload=with_payload,
             )
         except:
             # Fallback to query_points for older API versions
             results = client.query_points(
                 collection_name=collection,
                 query=vector,
-                limit=top_k
+                limit=limit,
+                query_filter=query_filter,
+                search_params=params,
+                with_payload=with_payload,
             ).points
-        
-        # Debug: print first result payload to verify AR model field
-        if results:
-            st.write("DEBUG: First result payload:", results[0].payload if hasattr(results[0], 'payload') else results[0])
-        
+
+        if investment_weights:
+            results = [hit for hit, _, _ in rerank(results, top_k, investment_weights, semantic_weight)]
         return results
     except Exception as e:
         st.error(f"Search error: {str(e)}")
@@ -58,17 +71,40 @@ st.sidebar.header("🔎 Product Search")
 search_query = st.sidebar.text_input("Enter your search query:")
 collection = st.sidebar.selectbox("Select collection:", ["clothing", "watches"], index=0)
 top_k = st.sidebar.slider("Number of results", min_value=1, max_value=10, value=5)
+with st.sidebar.expander("Filters"):
+    category_filter = st.text_input("Category", help="Exact category, e.g. shoes")
+    price_range = st.slider("Price ($)", min_value=0, max_value=2000, value=(0, 2000), step=10)
+    filter_expr = st.text_input("Advanced filter", placeholder="roi>0.1, liquidity>=0.5, volatility<0.3")
+try:
+    filters = filter_spec(
+        filter_expr,
+        category=category_filter.strip() or None,
+        price={"gte": price_range[0], "lte": price_range[1]} if price_range != (0, 2000) else None,
+    )
+except FilterError as e:
+    st.sidebar.error(str(e))
+    filters = None
+investment_mode = st.sidebar.toggle("Investment mode", help="Rank by similarity blended with ROI, liquidity and volatility")
+investment_weights = None
+semantic_weight = SEMANTIC_WEIGHT
+if investment_mode:
+    with st.sidebar.expander("Investment weights"):
+        investment_weights = {
+            field: st.slider(field.capitalize(), min_value=-1.0, max_value=1.0, value=float(w), step=0.05)
+            for field, w in INVESTMENT_WEIGHTS.items()
+        }
+        semantic_weight = st.slider("Similarity share", min_value=0.0, max_value=1.0, value=SEMANTIC_WEIGHT, step=0.05)
 
 # Perform search if query exists
 if search_query:
     st.markdown(f"### Search Results for: **{search_query}** in {collection}")
-    results = search_products(search_query, collection, top_k)
+    results = search_products(search_query, collection, top_k, filters, investment_weights, semantic_weight)
     if results:
         # Display results in columns
         cols = st.columns(min(3, len(results)))
         for idx, result in enumerate(results):
             # Handle both ScoredPoint and PointStruct responses
-            payload = result.payload if hasattr(result, 'payload') else result
+            payload = resolve_ar_urls(result.payload if hasattr(result, 'payload') else result)
             col = cols[idx % 3]
             with col:
                 st.markdown(f"#### {payload.get('name', 'N/A')}")
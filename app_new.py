@@ -2,11 +2,13 @@ import streamlit as st
 import sys
 sys.path.append('src')
 
-from qdrant_utils import get_client
+from qdrant_utils import get_client, get_search_params
+from ranking import INVESTMENT_WEIGHTS, SEMANTIC_WEIGHT, candidate_limit, rerank
+from search_filters import FilterError, build_filter, filter_key, filter_spec
 from qdrant_client.models import Filter, FieldCondition, MatchValue
-import pandas as pd
 from streamlit.components.v1 import html
-from payload_utils import normalize_payload
+from payload_utils import DISPLAY_FIELDS, resolve_ar_urls
+from listing import DEFAULT_PAGE_SIZE as PAGE_SIZE, list_products
 
 # Page Configuration
 st.set_page_config(
@@ -176,8 +178,8 @@ st.markdown("""
 # Cache the model and client to avoid reloading
 @st.cache_resource
 def load_model():
-    from vectorize import get_embedding
-    return get_embedding
+    from vectorize import get_query_embedding
+    return get_query_embedding
 
 @st.cache_resource
 def load_qdrant_client():
@@ -187,43 +189,64 @@ get_embedding = load_model()
 client = load_qdrant_client()
 
 # Search function
-def search_products(query: str, collection: str, top_k: int):
+def search_products(query: str, collection: str, top_k: int, filters=None, investment_weights=None,
+                    semantic_weight=None):
     if not query.strip():
         st.warning("Please enter a search query")
         return []
     
     try:
         vector = get_embedding(query)
+        params = get_search_params(client, collection)
+        query_filter = build_filter(filters)
+        # Investment mode: over-fetch, then rerank by semantic + investment score.
+        limit = candidate_limit(top_k) if investment_weights else top_k
+        with_payload = DISPLAY_FIELDS + list(investment_weights or [])
         try:
             results = client.search(
                 collection_name=collection,
                 query_vector=vector,
-                limit=top_k
+                limit=limit,
+                query_filter=query_filter,
+                search_params=params,
+                with_payload=with_payload,
             )
         except:
             results = client.query_points(
                 collection_name=collection,
                 query=vector,
-                limit=top_k
+                limit=limit,
+                query_filter=query_filter,
+                search_params=params,
+                with_payload=with_payload,
             ).points
-        
+
+        if investment_weights:
+            results = [hit for hit, _, _ in rerank(results, top_k, investment_weights, semantic_weight)]
         return results
     except Exception as e:
         st.error(f"Search error: {str(e)}")
         return []
 
 
-def load_all_products(collection: str) -> list[dict]:
-    if collection == "nike_shoes":
-        df = pd.read_csv("data/nike_shoes.csv")
-    elif collection == "clothing":
-        df = pd.read_parquet("data/clothing.parquet")
-        df = df.rename(columns={"title": "name", "subtitle": "description"})
-    else:
-        df = pd.read_csv("data/watches.csv")
+@st.cache_data(ttl=60, show_spinner=False)
+def load_products_page(collection: str, cursor: str | None, filters: dict | None) -> tuple[list[dict], str | None]:
+    # One scroll page of tile fields; cached so reruns (every keystroke) don't refetch.
+    items, next_cursor = list_products(client, collection, PAGE_SIZE, cursor, query_filter=build_filter(filters))
+    return [resolve_ar_urls(payload) for payload in items], next_cursor
 
-    df = df[["name", "description", "price", "category"]].dropna()
-    return [normalize_payload(row) for _, row in df.iterrows()]
+
+def catalog_state(collection: str, filters: dict | None) -> dict:
+    """
+    Pages loaded so far for the current collection/filters, reset when either changes.
+    """
+    key = (collection, filter_key(filters))
+    state = st.session_state.get("catalog")
+    if state is None or state["key"] != key:
+        items, cursor = load_products_page(collection, None, filters)
+        state = {"key": key, "items": items, "cursor": cursor}
+        st.session_state.catalog = state
+    return state
 
 
 def assistant_reply(user_text: str, collection: str) -> str:
@@ -231,7 +254,7 @@ def assistant_reply(user_text: str, collection: str) -> str:
     if not query:
         return "Ask me about products, prices, or categories."
 
-    results = search_products(query, collection, top_k=3)
+    results = search_products(query, collection, top_k=3, filters=filters)
     if not results:
         return "I couldn't find matching products. Try a different description."
 
@@ -278,6 +301,35 @@ with st.sidebar:
         help="Number of products to show"
     )
 
+    with st.expander("🎯 Filters"):
+        category_filter = st.text_input("Category", help="Exact category, e.g. shoes")
+        price_range = st.slider("Price ($)", min_value=0, max_value=2000, value=(0, 2000), step=10)
+        filter_expr = st.text_input("Advanced filter", placeholder="roi>0.1, liquidity>=0.5, volatility<0.3")
+    try:
+        filters = filter_spec(
+            filter_expr,
+            category=category_filter.strip() or None,
+            price={"gte": price_range[0], "lte": price_range[1]} if price_range != (0, 2000) else None,
+        )
+    except FilterError as e:
+        st.error(str(e))
+        filters = None
+
+    investment_mode = st.toggle(
+        "📈 Investment mode",
+        value=False,
+        help="Rank by similarity blended with ROI, liquidity and volatility"
+    )
+    investment_weights = None
+    semantic_weight = SEMANTIC_WEIGHT
+    if investment_mode:
+        with st.expander("⚖️ Investment weights"):
+            investment_weights = {
+                field: st.slider(field.capitalize(), min_value=-1.0, max_value=1.0, value=float(w), step=0.05)
+                for field, w in INVESTMENT_WEIGHTS.items()
+            }
+            semantic_weight = st.slider("Similarity share", min_value=0.0, max_value=1.0, value=SEMANTIC_WEIGHT, step=0.05)
+
     show_grid_ar = st.toggle(
         "Show AR preview in grid",
         value=False,
@@ -345,11 +397,11 @@ with main_col:
         st.markdown(f'<p class="main-header" style="font-size: 2rem;">Search Results for "{search_query}"</p>', unsafe_allow_html=True)
         st.markdown(f'<p class="subheader">Collection: **{collection.upper()}** | Top {top_k} Results</p>', unsafe_allow_html=True)
         
-        results = search_products(search_query, collection, top_k)
+        results = search_products(search_query, collection, top_k, filters, investment_weights, semantic_weight)
         
         if results:
             for idx, result in enumerate(results, 1):
-                payload = result.payload if hasattr(result, 'payload') else result
+                payload = resolve_ar_urls(result.payload if hasattr(result, 'payload') else result)
                 
                 with st.container():
                     st.markdown('<div class="product-card">', unsafe_allow_html=True)
@@ -417,7 +469,8 @@ with main_col:
     st.markdown('<p class="main-header" style="font-size: 2rem;">All Products</p>', unsafe_allow_html=True)
     st.markdown(f'<p class="subheader">Collection: **{collection.upper()}**</p>', unsafe_allow_html=True)
 
-    all_products = load_all_products(collection)
+    catalog = catalog_state(collection, filters)
+    all_products = catalog["items"]
     if all_products:
         st.markdown('<div class="product-row">', unsafe_allow_html=True)
         for payload in all_products:
@@ -463,6 +516,11 @@ with main_col:
 """
                 html(viewer_html_small, height=230)
         st.markdown('</div>', unsafe_allow_html=True)
+
+        if catalog["cursor"] and st.button(f"Load more ({len(all_products)} shown)", key="catalog_more"):
+            items, catalog["cursor"] = load_products_page(collection, catalog["cursor"], filters)
+            catalog["items"].extend(items)
+            st.rerun()
     else:
         st.warning("No products found in this collection.")
 
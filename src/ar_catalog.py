@@ -0,0 +1,152 @@
+import argparse
+import json
+import os
+import re
+import threading
+import time
+from pathlib import Path
+
+CATALOG_PATH = os.getenv("AR_CATALOG_PATH", str(Path(__file__).resolve().parent.parent / "data" / "ar_assets.json"))
+# Seconds between mtime checks for hot reload.
+RELOAD_INTERVAL = float(os.getenv("AR_CATALOG_RELOAD_INTERVAL", "5"))
+
+
+def _trie_regex(words: list[str]) -> str:
+    """
+    Regex source for a trie over `words`, so matching costs O(pattern depth)
+    per text position instead of O(number of patterns). Longer continuations
+    come first, so the longest pattern starting at a position wins.
+    """
+    trie: dict = {}
+    for word in words:
+        node = trie
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def build(node: dict) -> str:
+        ends = "" in node
+        branches = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        if ends:
+            return "(?:" + body + ")?"
+        return body
+
+    return build(trie)
+
+
+class AssetCatalog:
+    """
+    Maps product names to AR assets using ordered rules. A rule matches when
+    any of its patterns occurs as a substring of the lower-cased name; the
+    earliest matching rule wins. All patterns are compiled into one regex.
+    """
+
+    def __init__(self, rules: list[dict]):
+        self.rules = rules
+        rule_of: dict[str, int] = {}
+        for index, rule in enumerate(rules):
+            for pattern in rule.get("patterns", []):
+                literal = str(pattern or "").strip().lower()
+                if not literal:
+                    # An empty pattern would match every name; ignore it rather than fail the load.
+                    print(f"[WARN] AR catalog rule {index} has a blank pattern; skipping it")
+                    continue
+                rule_of.setdefault(literal, index)
+        # Only the longest pattern at a position is reported, so a pattern
+        # inherits the best rule among patterns that are its prefixes.
+        self._rule_of = {
+            literal: min(rule_of.get(literal[:i], index) for i in range(1, len(literal) + 1))
+            for literal, index in rule_of.items()
+        }
+        source = _trie_regex(sorted(self._rule_of))
+        self._regex = re.compile(f"(?=({source}))") if source else None
+
+    @classmethod
+    def from_file(cls, path: str = CATALOG_PATH) -> "AssetCatalog":
+        with open(path, "r", encoding="utf-8") as f:
+            return cls(json.load(f).get("rules", []))
+
+    def match_index(self, product_name: str):
+        """
+        Index of the winning rule for an already lower-cased name, or None.
+        """
+        if self._regex is None:
+            return None
+        best = None
+        for m in self._regex.finditer(product_name):
+            idx = self._rule_of.get(m.group(1))
+            if idx is not None and (best is None or idx < best):
+                best = idx
+                if best == 0:
+                    break
+        return best
+
+    def match(self, product_name: str):
+        """
+        Winning rule ({"glb": ..., "usdz": ...}) for a product name, or None.
+        """
+        idx = self.match_index(str(product_name).strip().lower())
+        return None if idx is None else self.rules[idx]
+
+
+_catalog: AssetCatalog | None = None
+_catalog_mtime = None
+_catalog_checked = 0.0
+_catalog_lock = threading.Lock()
+
+
+def get_catalog(path: str = CATALOG_PATH) -> AssetCatalog:
+    """
+    Shared catalog, reloaded when the file changes (checked every RELOAD_INTERVAL s).
+    """
+    global _catalog, _catalog_mtime, _catalog_checked
+    now = time.monotonic()
+    if _catalog is not None and now - _catalog_checked < RELOAD_INTERVAL:
+        return _catalog
+    with _catalog_lock:
+        _catalog_checked = now
+        try:
+            mtime = os.path.getmtime(path)
+        except OSError:
+            mtime = None
+        if _catalog is None or mtime != _catalog_mtime:
+            try:
+                _catalog = AssetCatalog.from_file(path) if mtime is not None else AssetCatalog([])
+            except (OSError, ValueError, TypeError, AttributeError) as e:
+                # A bad edit must not break payloads or requests; keep the last good catalog.
+                print(f"[WARN] Could not load AR catalog {path}: {e}")
+                if _catalog is None:
+                    _catalog = AssetCatalog([])
+            _catalog_mtime = mtime
+    return _catalog
+
+
+def bench(n: int = 1_000_000, path: str = CATALOG_PATH, extra_rules: int = 0):
+    import random
+
+    catalog = AssetCatalog.from_file(path)
+    if extra_rules:
+        # Synthetic brands/models to show cost doesn't grow with the rule count.
+        synthetic = [{"patterns": [f"brand{i} model{i % 97}"], "glb": f"asset_{i}.glb"} for i in range(extra_rules)]
+        catalog = AssetCatalog(catalog.rules + synthetic)
+    words = ["air", "max", "90", "jordan", "retro", "dunk", "low", "pro", "nike", "adidas", "classic", "runner"]
+    rng = random.Random(42)
+    names = [" ".join(rng.choice(words) for _ in range(rng.randint(2, 6))) for _ in range(n)]
+
+    started = time.perf_counter()
+    matched = sum(catalog.match_index(name) is not None for name in names)
+    elapsed = time.perf_counter() - started
+    print(f"[BENCH] {n} names, {len(catalog.rules)} rules: {elapsed:.2f}s "
+          f"({n / elapsed:,.0f} names/s), {matched} matched")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--bench", type=int, default=1_000_000, help="Number of synthetic product names to match")
+    parser.add_argument("--catalog", type=str, default=CATALOG_PATH, help="Asset catalog JSON")
+    parser.add_argument("--extra_rules", type=int, default=0, help="Synthetic rules appended to the catalog")
+    args = parser.parse_args()
+    bench(args.bench, args.catalog, args.extra_rules)
@@ -0,0 +1,84 @@
+import os
+
+from qdrant_client.models import (
+    BinaryQuantization, BinaryQuantizationConfig, Distance, HnswConfigDiff, OptimizersConfigDiff,
+    QuantizationSearchParams, ScalarQuantization, ScalarQuantizationConfig, ScalarType, SearchParams, VectorParams,
+)
+
+# Used when a dataset doesn't name a profile.
+DEFAULT_PROFILE = os.getenv("COLLECTION_PROFILE", "balanced")
+
+# Rough RAM per 384-dim vector: float32 1536 B, int8 384 B, binary 48 B.
+# Storage placement uses on_disk on vectors and payload; the optimizer's
+# memmap_threshold is deprecated since Qdrant 1.15 and is not set.
+PROFILES = {
+    # Everything in RAM, denser graph, int8 copy for fast scoring.
+    "low-latency": {
+        "hnsw": {"m": 32, "ef_construct": 256, "on_disk": False},
+        "vectors_on_disk": False,
+        "payload_on_disk": False,
+        "quantization": "int8",
+        "optimizers": {"indexing_threshold": 20000, "default_segment_number": 4},
+        "search": {"hnsw_ef": 128, "rescore": True, "oversampling": 1.5},
+    },
+    # Originals on disk, int8 copy in RAM, rescored from disk.
+    "balanced": {
+        "hnsw": {"m": 16, "ef_construct": 128, "on_disk": False},
+        "vectors_on_disk": True,
+        "payload_on_disk": True,
+        "quantization": "int8",
+        "optimizers": {"indexing_threshold": 20000},
+        "search": {"hnsw_ef": 64, "rescore": True, "oversampling": 2.0},
+    },
+    # Only 1-bit codes in RAM. Binary loses more at 384 dims than on large
+    # models, so it leans on heavier oversampling and rescoring.
+    "memory-lean": {
+        "hnsw": {"m": 12, "ef_construct": 100, "on_disk": True},
+        "vectors_on_disk": True,
+        "payload_on_disk": True,
+        "quantization": "binary",
+        "optimizers": {"indexing_threshold": 20000, "default_segment_number": 2},
+        "search": {"hnsw_ef": 64, "rescore": True, "oversampling": 4.0},
+    },
+}
+
+
+def get_profile(name: str = None) -> dict:
+    name = name or DEFAULT_PROFILE
+    if name not in PROFILES:
+        raise ValueError(f"Unknown collection profile '{name}' (expected one of {', '.join(PROFILES)})")
+    return PROFILES[name]
+
+
+def _quantization_config(kind: str):
+    if kind == "int8":
+        return ScalarQuantization(scalar=ScalarQuantizationConfig(type=ScalarType.INT8, quantile=0.99, always_ram=True))
+    if kind == "binary":
+        return BinaryQuantization(binary=BinaryQuantizationConfig(always_ram=True))
+    return None
+
+
+def collection_config(vector_size: int, name: str = None) -> dict:
+    """
+    Keyword arguments for client.create_collection under profile `name`.
+    """
+    profile = get_profile(name)
+    return {
+        "vectors_config": VectorParams(size=vector_size, distance=Distance.COSINE, on_disk=profile["vectors_on_disk"]),
+        "hnsw_config": HnswConfigDiff(**profile["hnsw"]),
+        "optimizers_config": OptimizersConfigDiff(**profile["optimizers"]),
+        "quantization_config": _quantization_config(profile["quantization"]),
+        "on_disk_payload": profile["payload_on_disk"],
+    }
+
+
+def search_params(name: str = None) -> SearchParams:
+    """
+    Query-time parameters matching profile `name` (ef and quantized rescoring).
+    """
+    profile = get_profile(name)
+    search = profile["search"]
+    quantization = None
+    if profile["quantization"]:
+        quantization = QuantizationSearchParams(rescore=search["rescore"], oversampling=search["oversampling"])
+    return SearchParams(hnsw_ef=search["hnsw_ef"], quantization=quantization)
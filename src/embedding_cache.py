@@ -0,0 +1,169 @@
+import hashlib
+import os
+import sqlite3
+import threading
+
+import numpy as np
+
+DEFAULT_CACHE_DIR = os.getenv("EMBEDDING_CACHE_DIR", ".cache/embeddings")
+DEFAULT_MAX_ENTRIES = int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", "500000"))
+
+
+def normalize_text(text: str) -> str:
+    return " ".join(str(text).split())
+
+
+def cache_key(model_name: str, text: str) -> bytes:
+    return hashlib.sha1(f"{model_name}\0{normalize_text(text)}".encode("utf-8")).digest()
+
+
+class EmbeddingCache:
+    """
+    Persistent embedding cache keyed by hash(model name, normalized text).
+
+    Vectors live in a fixed-size float32 memory-mapped file; a small SQLite
+    index maps each key to its slot and tracks recency. When every slot is
+    taken the least recently used entries are evicted and their slots reused.
+    """
+
+    def __init__(self, model_name: str, dim: int, path: str = DEFAULT_CACHE_DIR, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.model_name = model_name
+        self.dim = dim
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+        os.makedirs(path, exist_ok=True)
+        vectors_path = os.path.join(path, f"vectors_{dim}.f32")
+        mode = "r+" if os.path.exists(vectors_path) else "w+"
+        self._vectors = np.memmap(vectors_path, dtype=np.float32, mode=mode, shape=(max_entries, dim))
+
+        self._db = sqlite3.connect(os.path.join(path, f"index_{dim}.sqlite"), check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS entries (key BLOB PRIMARY KEY, slot INTEGER NOT NULL, last_used INTEGER NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS entries_last_used ON entries (last_used)")
+        # Entries beyond the slot range (cache shrunk between runs) are stale.
+        self._db.execute("DELETE FROM entries WHERE slot >= ?", (max_entries,))
+        self._db.commit()
+        row = self._db.execute("SELECT COALESCE(MAX(last_used), 0), COALESCE(MAX(slot) + 1, 0) FROM entries").fetchone()
+        self._tick, self._next_slot = row
+
+    def __len__(self):
+        return self._db.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    def get_many(self, texts: list[str]) -> list:
+        """
+        Return a list aligned with `texts`: a float32 vector for hits, None for misses.
+        """
+        keys = [cache_key(self.model_name, t) for t in texts]
+        out = [None] * len(texts)
+        with self._lock:
+            self._tick += 1
+            slots = self._lookup(keys)
+            for i, key in enumerate(keys):
+                slot = slots.get(key)
+                if slot is not None:
+                    out[i] = np.array(self._vectors[slot])
+            if slots:
+                self._db.executemany(
+                    "UPDATE entries SET last_used = ? WHERE key = ?", [(self._tick, k) for k in slots]
+                )
+                self._db.commit()
+            self.hits += sum(v is not None for v in out)
+            self.misses += sum(v is None for v in out)
+        return out
+
+    def put_many(self, texts: list[str], vectors):
+        rows = {cache_key(self.model_name, t): v for t, v in zip(texts, vectors)}
+        with self._lock:
+            self._tick += 1
+            existing = self._lookup(list(rows))
+            # Touch existing keys first so eviction below can't pick them.
+            self._db.executemany("UPDATE entries SET last_used = ? WHERE key = ?", [(self._tick, k) for k in existing])
+            new_keys = [k for k in rows if k not in existing]
+            free = self._allocate(len(new_keys), reserved=len(existing))
+            slots = dict(existing)
+            slots.update(zip(new_keys, free))
+            for key, slot in slots.items():
+                self._vectors[slot] = np.asarray(rows[key], dtype=np.float32)
+            self._vectors.flush()
+            self._db.executemany(
+                "INSERT OR REPLACE INTO entries (key, slot, last_used) VALUES (?, ?, ?)",
+                [(k, s, self._tick) for k, s in slots.items()],
+            )
+            self._db.commit()
+
+    def _lookup(self, keys: list[bytes]) -> dict:
+        slots = {}
+        for i in range(0, len(keys), 500):
+            part = keys[i:i + 500]
+            marks = ",".join("?" * len(part))
+            for key, slot in self._db.execute(f"SELECT key, slot FROM entries WHERE key IN ({marks})", part):
+                slots[key] = slot
+        return slots
+
+    def _allocate(self, n: int, reserved: int = 0) -> list[int]:
+        """
+        Exactly `n` free slots, evicting least recently used entries as needed.
+        `reserved` entries were touched in this call and cannot be evicted.
+        """
+        if n + reserved > self.max_entries:
+            raise ValueError(f"Cannot cache {n + reserved} vectors in a cache of {self.max_entries} entries")
+        take = min(n, self.max_entries - self._next_slot)
+        free = list(range(self._next_slot, self._next_slot + take))
+        self._next_slot += take
+        if len(free) < n:
+            # Evict the least recently used entries and recycle their slots.
+            victims = self._db.execute(
+                "SELECT key, slot FROM entries WHERE last_used < ? ORDER BY last_used ASC LIMIT ?",
+                (self._tick, n - len(free)),
+            ).fetchall()
+            self._db.executemany("DELETE FROM entries WHERE key = ?", [(k,) for k, _ in victims])
+            self.evictions += len(victims)
+            free += [s for _, s in victims]
+        if len(free) != n:
+            raise RuntimeError(f"Embedding cache allocated {len(free)} of {n} slots; index and vector file disagree")
+        return free
+
+    def embed(self, texts: list[str], encode_fn) -> np.ndarray:
+        """
+        Return embeddings for `texts` as an (n, dim) float32 array, encoding
+        (and caching) only the misses.
+        """
+        cached = self.get_many(texts)
+        out = np.empty((len(texts), self.dim), dtype=np.float32)
+        missing = []
+        for i, v in enumerate(cached):
+            if v is None:
+                missing.append(i)
+            else:
+                out[i] = v
+        if missing:
+            # Encode each distinct missing text once.
+            unique = list(dict.fromkeys(normalize_text(texts[i]) for i in missing))
+            fresh = np.asarray(encode_fn(unique), dtype=np.float32)
+            # A batch larger than the whole cache keeps only its last max_entries vectors.
+            keep = min(len(unique), self.max_entries)
+            self.put_many(unique[-keep:], fresh[-keep:])
+            row_of = {t: j for j, t in enumerate(unique)}
+            out[missing] = fresh[[row_of[normalize_text(texts[i])] for i in missing]]
+        return out
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+            "evictions": self.evictions,
+        }
+
+    def close(self):
+        with self._lock:
+            self._vectors.flush()
+            self._db.close()
@@ -0,0 +1,148 @@
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable
+
+DEFAULT_MAX_BATCH = int(os.getenv("EMBED_MAX_BATCH", "32"))
+DEFAULT_MAX_WAIT_MS = float(os.getenv("EMBED_MAX_WAIT_MS", "5"))
+
+# Upper bounds of the batch-size histogram buckets.
+_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+
+
+class EmbeddingBatcher:
+    """
+    In-process embedding server with dynamic micro-batching.
+
+    Callers submit one text and get a Future back. A single worker thread
+    waits for the first request, keeps collecting until `max_batch` texts are
+    queued or `max_wait_ms` has passed, encodes them in one call and fans the
+    vectors back out. Only the worker touches the model, so concurrent
+    requests no longer fight over the torch thread pool.
+    """
+
+    def __init__(self, encode_fn: Callable[[list[str]], list], max_batch: int = DEFAULT_MAX_BATCH,
+                 max_wait_ms: float = DEFAULT_MAX_WAIT_MS):
+        self.encode_fn = encode_fn
+        self.max_batch = max(1, max_batch)
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue: queue.Queue = queue.Queue()
+        self._closed = threading.Event()
+        self._lock = threading.Lock()
+        self._batches = 0
+        self._items = 0
+        self._encode_seconds = 0.0
+        self._wait_seconds = 0.0
+        self._histogram = {b: 0 for b in _BUCKETS}
+        self._histogram["+Inf"] = 0
+        self._worker = threading.Thread(target=self._run, name="embedding-batcher", daemon=True)
+        self._worker.start()
+
+    def submit(self, text: str) -> Future:
+        if self._closed.is_set():
+            raise RuntimeError("EmbeddingBatcher is closed")
+        fut: Future = Future()
+        self._queue.put((text, fut, time.perf_counter()))
+        return fut
+
+    def submit_many(self, texts: list[str]) -> Future:
+        """
+        Queue several texts as one unit: they are encoded in the same call
+        and the Future resolves to their vectors, in order.
+        """
+        if self._closed.is_set():
+            raise RuntimeError("EmbeddingBatcher is closed")
+        fut: Future = Future()
+        self._queue.put((list(texts), fut, time.perf_counter()))
+        return fut
+
+    def embed(self, text: str, timeout: float = None) -> list[float]:
+        return self.submit(text).result(timeout=timeout)
+
+    def _collect(self) -> list:
+        item = self._queue.get()
+        if item is None:
+            return []
+        batch = [item]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is None:
+                self._queue.put(None)  # let the outer loop see the shutdown
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        while not self._closed.is_set():
+            try:
+                batch = self._collect()
+                # Drop requests cancelled while queued (e.g. a caller's wait_for
+                # timed out); the rest become RUNNING and can no longer be cancelled.
+                batch = [item for item in batch if item[1].set_running_or_notify_cancel()]
+                if batch:
+                    self._process(batch)
+            except Exception as e:  # never let one bad batch kill the worker
+                print(f"[WARN] Embedding batch failed: {e!r}")
+
+    def _process(self, batch: list):
+        texts = []
+        for text, _, _ in batch:
+            texts.extend(text if isinstance(text, list) else [text])
+        started = time.perf_counter()
+        try:
+            vectors = self.encode_fn(texts)
+        except Exception as e:
+            for _, fut, _ in batch:
+                fut.set_exception(e)
+            return
+        finished = time.perf_counter()
+        pos = 0
+        for text, fut, _ in batch:
+            if isinstance(text, list):
+                fut.set_result(vectors[pos:pos + len(text)])
+                pos += len(text)
+            else:
+                fut.set_result(vectors[pos])
+                pos += 1
+        self._record(batch, len(texts), started, finished)
+
+    def _record(self, batch: list, size: int, started: float, finished: float):
+        with self._lock:
+            self._batches += 1
+            self._items += size
+            self._encode_seconds += finished - started
+            self._wait_seconds += sum(started - enqueued for _, _, enqueued in batch)
+            for bound in _BUCKETS:
+                if size <= bound:
+                    self._histogram[bound] += 1
+                    break
+            else:
+                self._histogram["+Inf"] += 1
+
+    def metrics(self) -> dict:
+        with self._lock:
+            return {
+                "queue_depth": self._queue.qsize(),
+                "max_batch": self.max_batch,
+                "max_wait_ms": self.max_wait * 1000.0,
+                "batches": self._batches,
+                "items": self._items,
+                "avg_batch_size": round(self._items / self._batches, 2) if self._batches else 0.0,
+                "avg_queue_wait_ms": round(1000.0 * self._wait_seconds / self._items, 3) if self._items else 0.0,
+                "avg_encode_ms": round(1000.0 * self._encode_seconds / self._batches, 3) if self._batches else 0.0,
+                "batch_size_histogram": {str(k): v for k, v in self._histogram.items()},
+            }
+
+    def close(self):
+        self._closed.set()
+        self._queue.put(None)
+        self._worker.join(timeout=5)
@@ -0,0 +1,114 @@
+import argparse
+import multiprocessing as mp
+import os
+import time
+
+import numpy as np
+
+from vectorize import EMBEDDING_BACKEND
+
+DEFAULT_WORKERS = int(os.getenv("ENCODE_WORKERS", str(os.cpu_count() or 1)))
+DEFAULT_BATCH_SIZE = int(os.getenv("ENCODE_BATCH_SIZE", "64"))
+
+# Per-worker model replica, created by _init_worker in each child process.
+_worker_backend = None
+
+
+def _init_worker(backend_name: str, threads: int):
+    global _worker_backend
+    try:
+        import torch
+
+        # Without this every replica spins up one thread per core and they thrash.
+        torch.set_num_threads(threads)
+    except ImportError:
+        pass
+    from vectorize import load_backend
+
+    _worker_backend = load_backend(backend_name)
+
+
+def _encode_batch(texts: list[str]) -> np.ndarray:
+    return np.asarray(_worker_backend.encode(texts, batch_size=len(texts)), dtype=np.float32)
+
+
+class EncodePool:
+    """
+    Multi-process encoder for bulk ingestion: one model replica per worker.
+
+    Texts are sorted by length before being cut into batches, so each batch
+    pads to a similar length, and the vectors are scattered back so the
+    result is in input order.
+    """
+
+    def __init__(self, workers: int = DEFAULT_WORKERS, batch_size: int = DEFAULT_BATCH_SIZE,
+                 backend: str = EMBEDDING_BACKEND, threads_per_worker: int = None):
+        self.workers = max(1, workers)
+        self.batch_size = max(1, batch_size)
+        self.backend = backend
+        self.threads_per_worker = threads_per_worker or max(1, (os.cpu_count() or 1) // self.workers)
+        self._pool = None
+
+    def start(self):
+        if self._pool is None:
+            # spawn, not fork: forking a process that already initialized torch can deadlock.
+            ctx = mp.get_context("spawn")
+            self._pool = ctx.Pool(
+                processes=self.workers,
+                initializer=_init_worker,
+                initargs=(self.backend, self.threads_per_worker),
+            )
+        return self
+
+    def encode(self, texts: list[str]) -> np.ndarray:
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+        self.start()
+        order = np.argsort([len(t) for t in texts], kind="stable")
+        batches = [order[i:i + self.batch_size] for i in range(0, len(order), self.batch_size)]
+        results = self._pool.imap(_encode_batch, [[texts[j] for j in idx] for idx in batches])
+
+        out = None
+        for idx, vectors in zip(batches, results):
+            if out is None:
+                out = np.empty((len(texts), vectors.shape[1]), dtype=np.float32)
+            out[idx] = vectors
+        return out
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def bench(n: int, worker_counts: list[int], batch_size: int):
+    base = ["running shoes", "Nike Air Max 90 Essentials Iconic cushioned running shoe",
+            "luxury swiss automatic diver watch with ceramic bezel and steel bracelet", "white trainers"]
+    texts = [f"{base[i % len(base)]} {i}" for i in range(n)]
+    baseline = None
+    for workers in worker_counts:
+        with EncodePool(workers=workers, batch_size=batch_size) as pool:
+            pool.encode(texts[: workers * batch_size])  # load replicas before timing
+            started = time.perf_counter()
+            pool.encode(texts)
+            elapsed = time.perf_counter() - started
+        rate = n / elapsed
+        baseline = baseline or rate
+        print(f"[BENCH] workers={workers:<3} batch={batch_size:<4} {elapsed:7.2f}s  "
+              f"{rate:10.1f} texts/s  speedup={rate / baseline:5.2f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--n", type=int, default=20000, help="Texts to encode")
+    parser.add_argument("--workers", type=str, default="1,2,4,8", help="Comma-separated worker counts")
+    parser.add_argument("--batch_size", type=int, default=DEFAULT_BATCH_SIZE, help="Texts per worker batch")
+    args = parser.parse_args()
+    bench(args.n, [int(w) for w in args.workers.split(",")], args.batch_size)
@@ -0,0 +1,63 @@
+import base64
+import json
+import os
+
+from payload_utils import DISPLAY_FIELDS
+
+# Payload fields a product tile renders; everything else stays on the server.
+TILE_FIELDS = DISPLAY_FIELDS
+DEFAULT_PAGE_SIZE = int(os.getenv("LISTING_PAGE_SIZE", "24"))
+MAX_PAGE_SIZE = 100
+
+
+class CursorError(ValueError):
+    pass
+
+
+def encode_cursor(collection: str, offset) -> str | None:
+    """
+    Opaque cursor for the page starting at point `offset`; None means no more pages.
+    """
+    if offset is None:
+        return None
+    raw = json.dumps({"c": collection, "o": offset}, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str | None, collection: str):
+    """
+    Scroll offset stored in `cursor`, or None for the first page.
+    """
+    if not cursor:
+        return None
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        collection_in_cursor, offset = data["c"], data["o"]
+    except (ValueError, KeyError, TypeError):
+        raise CursorError("Malformed cursor") from None
+    if collection_in_cursor != collection:
+        raise CursorError(f"Cursor belongs to collection '{collection_in_cursor}', not '{collection}'")
+    return offset
+
+
+def scroll_args(collection: str, limit: int = DEFAULT_PAGE_SIZE, cursor: str = None, query_filter=None) -> dict:
+    """
+    Keyword arguments for client.scroll (sync or async) for one page of tiles.
+    """
+    return {
+        "collection_name": collection,
+        "limit": max(1, min(limit, MAX_PAGE_SIZE)),
+        "offset": decode_cursor(cursor, collection),
+        "scroll_filter": query_filter,
+        "with_payload": TILE_FIELDS,
+        "with_vectors": False,
+    }
+
+
+def list_products(client, collection: str, limit: int = DEFAULT_PAGE_SIZE, cursor: str = None,
+                  query_filter=None) -> tuple[list[dict], str | None]:
+    """
+    One page of product tiles (payload dicts) and the cursor for the next page.
+    """
+    points, next_offset = client.scroll(**scroll_args(collection, limit, cursor, query_filter))
+    return [dict(p.payload or {}) for p in points], encode_cursor(collection, next_offset)
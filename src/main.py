@@ -1,72 +1,311 @@
 import os
+import argparse
 import pandas as pd
 from dotenv import load_dotenv
-from tqdm import tqdm
-from vectorize import get_embeddings
-from qdrant_utils import get_client, create_collection, upload_batch
-from payload_utils import normalize_payload
+from vectorize import MODEL_ID, encode_texts
+from embedding_cache import DEFAULT_CACHE_DIR, EmbeddingCache
+from qdrant_utils import (
+    get_client, create_collection, BulkUploader, UPLOAD_PARALLEL, set_payloads, delete_points,
+    resolve_alias, next_version_name, wait_until_ready, sample_points, warm_up, recall_check,
+    swap_alias, gc_versions, bump_data_version,
+)
+from payload_utils import build_payloads
+from pipeline import IngestPipeline, print_stats
+from encode_pool import DEFAULT_BATCH_SIZE as ENCODE_BATCH_SIZE, EncodePool
+from sync import KEY_FIELDS, DeltaPlanner, load_snapshot, save_snapshot, point_ids
+import resale_model
 
 load_dotenv(dotenv_path=r'C:\Users\MSI\Desktop\ArbitrageAI\.env')
 
 CHUNK_SIZE = 100
 VECTOR_SIZE = 384  # for all-MiniLM-L6-v2
 
+# Pipeline defaults; each stage can be tuned from the command line.
+READ_BATCH_SIZE = 1000
+EMBED_BATCH_SIZE = CHUNK_SIZE
+UPLOAD_BATCH_SIZE = CHUNK_SIZE
+UPLOAD_WRITERS = 4
+QUEUE_SIZE = 8
+
+FIELDS = ["name", "description", "price", "category"]
+
 def load_dataset(path: str, rename_map: dict) -> pd.DataFrame:
     df = pd.read_parquet(path) if path.endswith(".parquet") else pd.read_csv(path)
     df = df.rename(columns=rename_map)
-    df = df[["name", "description", "price", "category"]].dropna()
+    df = df[FIELDS].dropna()
     return df
 
-def process_and_upload(client, df: pd.DataFrame, collection: str):
+def _source_columns(rename_map: dict) -> list[str]:
+    # Invert the rename map so we only read the columns we actually need.
+    inverse = {dst: src for src, dst in rename_map.items()}
+    return [inverse.get(field, field) for field in FIELDS]
+
+def iter_dataset(path: str, rename_map: dict, batch_size: int = READ_BATCH_SIZE):
+    """
+    Stream a dataset as DataFrames of at most `batch_size` rows.
+
+    Parquet is read row group by row group and CSV chunk by chunk, projecting
+    only the four payload columns, so memory is bounded by the batch size
+    rather than the file size.
+    """
+    columns = _source_columns(rename_map)
+    if path.endswith(".parquet"):
+        import pyarrow.parquet as pq
+
+        parquet_file = pq.ParquetFile(path)
+        batches = (b.to_pandas() for b in parquet_file.iter_batches(batch_size=batch_size, columns=columns))
+    else:
+        batches = pd.read_csv(path, usecols=columns, chunksize=batch_size)
+
+    for chunk in batches:
+        chunk = chunk.rename(columns=rename_map)[FIELDS].dropna()
+        if len(chunk):
+            yield chunk
+
+def process_and_upload(client, frames, collection: str, cache: EmbeddingCache = None, key_fields=KEY_FIELDS,
+                       encode_fn=encode_texts, upload_parallel: int = UPLOAD_PARALLEL, verbose_upload: bool = False,
+                       profile: str = None, payload_fn=build_payloads, **pipeline_opts):
+    """
+    `frames` is either a whole DataFrame or an iterable of DataFrames
+    (e.g. from iter_dataset). With a cache, only texts not seen before
+    (for this model) are sent to `encode_fn`. Point IDs are derived from
+    `key_fields`, so re-uploading a product overwrites it in place.
+    Upserts go through a BulkUploader starting at `upload_batch_size`.
+    A new collection is created with the tuning `profile` (see
+    collection_profiles); existing ones keep theirs. `payload_fn` builds
+    the payloads for each batch of rows.
+    """
     print(f"\n[INFO] Creating collection: {collection}")
-    create_collection(client, collection, VECTOR_SIZE)
-    for i in tqdm(range(0, len(df), CHUNK_SIZE)):
-        chunk = df.iloc[i:i+CHUNK_SIZE]
-        texts = (chunk["name"] + " " + chunk["description"]).tolist()
-        print(f"[INFO] Processing chunk {i//CHUNK_SIZE+1} / {((len(df)-1)//CHUNK_SIZE)+1}")
-        vectors = get_embeddings(texts)
-        # Normalize payloads and add AR model URLs
-        payloads = [normalize_payload(row) for _, row in chunk.iterrows()]
-        upload_batch(client, collection, vectors, payloads)
-        print(f"[INFO] Uploaded chunk {i//CHUNK_SIZE+1}")
+    create_collection(client, collection, VECTOR_SIZE, profile=profile)
+
+    embed_fn = encode_fn
+    if cache is not None:
+        embed_fn = lambda texts: cache.embed(texts, encode_fn)
+
+    uploader = BulkUploader(
+        client, collection, parallel=upload_parallel,
+        batch_size=pipeline_opts.pop("upload_batch_size", UPLOAD_BATCH_SIZE), verbose=verbose_upload,
+    )
+    pipeline = IngestPipeline(
+        embed_fn=embed_fn,
+        payload_fn=payload_fn,
+        upload_fn=lambda batch: uploader.upload(batch.vectors, batch.payloads, ids=point_ids(batch.df, key_fields)),
+        # The uploader sizes requests itself, so writers hand it whole batches.
+        upload_batch_size=pipeline_opts.get("read_batch_size", READ_BATCH_SIZE),
+        **pipeline_opts,
+    )
+    if isinstance(frames, pd.DataFrame):
+        frames = [frames]
+    try:
+        stats = pipeline.run(frames)
+        if not uploader.finish():
+            raise RuntimeError(f"Upserts into {collection} were acknowledged but could not be confirmed as applied")
+    finally:
+        uploader.close()
+    print_stats(collection, stats)
+    print(f"[INFO] Upload: {uploader.stats()}")
+    if cache is not None:
+        print(f"[INFO] Embedding cache: {cache.stats()}")
+    return stats
+
+def score_resale(client, collection: str) -> bool:
+    """
+    Re-run the offline resale scoring on `collection`. Loads replace
+    payloads, so predicted_resale/roi are gone (or stale) after every sync.
+    """
+    if not resale_model.model_available():
+        print(f"[WARN] No resale model at {resale_model.RESALE_MODEL_PATH}; "
+              f"{collection} has no predicted_resale/roi until src/resale_model.py is run")
+        return False
+    resale_model.score_collection(client, collection)
+    return True
+
+def sync_collection(client, frames, collection: str, mode: str = "delta", key_fields=KEY_FIELDS,
+                    rescore: bool = False, **upload_opts):
+    """
+    Bring `collection` in line with `frames`.
+
+    "full" drops the collection and reloads every row. "delta" keeps the
+    collection online and only sends what changed since the last snapshot:
+    new/edited products are embedded and upserted, payload-only changes go
+    through set_payload, and products missing from the source are deleted.
+    With `rescore`, resale predictions are recomputed after any change.
+    """
+    if isinstance(frames, pd.DataFrame):
+        frames = [frames]
+
+    if mode == "full":
+        if resolve_alias(client, collection):
+            raise RuntimeError(f"{collection} is served through an alias; reload it with --mode bluegreen")
+        try:
+            client.delete_collection(collection_name=collection)
+            print(f"Deleted old {collection} collection")
+        except Exception:
+            pass
+        previous = {}
+    else:
+        previous = load_snapshot(collection)
+
+    planner = DeltaPlanner(previous, MODEL_ID, build_payloads, key_fields=key_fields)
+    rows = planner.changed_rows(
+        frames,
+        on_payload_update=lambda ids, payloads: set_payloads(client, collection, ids, payloads),
+    )
+    process_and_upload(client, rows, collection, key_fields=key_fields, payload_fn=planner.payloads, **upload_opts)
+
+    deleted = planner.deleted_ids()
+    if deleted:
+        delete_points(client, collection, deleted)
+
+    save_snapshot(collection, planner.current)
+    if any(planner.counts[k] for k in ("inserted", "reembedded", "payload_updated", "deleted")):
+        # Lets the web layer's result cache notice the change.
+        bump_data_version(client, collection)
+        if rescore:
+            score_resale(client, collection)
+    print(f"[INFO] Sync summary for {collection}: {planner.counts}")
+    return planner.counts
+
+def rebuild_collection(client, frames, collection: str, key_fields=KEY_FIELDS, min_recall: float = 0.9,
+                       keep_versions: int = 2, rescore: bool = False, **upload_opts):
+    """
+    Blue/green reindex: load everything into a fresh "<collection>_v<N>",
+    wait for indexing, warm it up, check recall against the version that is
+    live now, then atomically repoint the `collection` alias at it. Searches
+    keep hitting the old version until the swap. With `rescore`, the new
+    version gets its resale predictions before it goes live.
+    """
+    if isinstance(frames, pd.DataFrame):
+        frames = [frames]
+
+    live = resolve_alias(client, collection)
+    if live is None and client.collection_exists(collection_name=collection):
+        live = collection
+    target = next_version_name(client, collection)
+
+    planner = DeltaPlanner({}, MODEL_ID, build_payloads, key_fields=key_fields)
+    process_and_upload(client, planner.changed_rows(frames), target, key_fields=key_fields,
+                       payload_fn=planner.payloads, **upload_opts)
+
+    if not wait_until_ready(client, target):
+        raise RuntimeError(f"{target} did not finish indexing; alias left on {live}")
+
+    if live is not None:
+        probes = sample_points(client, live)
+        warm_up(client, target, [p.vector for p in probes])
+        recall = recall_check(client, live, target)
+        print(f"[INFO] Recall of {target} against {live}: {recall:.2%}")
+        if recall < min_recall:
+            raise RuntimeError(f"{target} failed the recall check ({recall:.2%} < {min_recall:.0%}); alias left on {live}")
+
+    if rescore:
+        score_resale(client, target)
+
+    swap_alias(client, collection, target)
+    save_snapshot(collection, planner.current)
+    print(f"[INFO] Alias {collection} -> {target}")
+
+    removed = gc_versions(client, collection, keep=keep_versions)
+    if removed:
+        print(f"[INFO] Dropped old versions: {', '.join(removed)}")
+    return target
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--mode", choices=["full", "delta", "bluegreen"], default="full",
+                        help="full: drop and reload collections; delta: send only changes since the last sync; "
+                             "bluegreen: rebuild into a new version and swap the alias")
+    parser.add_argument("--min_recall", type=float, default=0.9, help="Recall required before a blue/green swap")
+    parser.add_argument("--keep_versions", type=int, default=2, help="Collection versions kept after a blue/green swap")
+    parser.add_argument("--read_batch", type=int, default=READ_BATCH_SIZE, help="Rows handed out by the reader per batch")
+    parser.add_argument("--embed_batch", type=int, default=EMBED_BATCH_SIZE, help="Texts per encoder call")
+    parser.add_argument("--upload_batch", type=int, default=UPLOAD_BATCH_SIZE,
+                        help="Initial points per Qdrant upsert (adapts to observed latency)")
+    parser.add_argument("--upload_parallel", type=int, default=UPLOAD_PARALLEL, help="Concurrent upsert requests")
+    parser.add_argument("--verbose_upload", action="store_true", help="Print latency and points/s for every upsert")
+    parser.add_argument("--writers", type=int, default=UPLOAD_WRITERS, help="Concurrent upsert threads")
+    parser.add_argument("--stream", action="store_true", help="Stream datasets in chunks instead of loading whole files")
+    parser.add_argument("--cache_dir", type=str, default=DEFAULT_CACHE_DIR, help="On-disk embedding cache location")
+    parser.add_argument("--cache_size", type=int, default=None, help="Max cached embeddings before LRU eviction")
+    parser.add_argument("--no_cache", action="store_true", help="Re-encode every row, bypassing the embedding cache")
+    parser.add_argument("--queue_size", type=int, default=QUEUE_SIZE, help="Max batches buffered between stages")
+    parser.add_argument("--encode_workers", type=int, default=0,
+                        help="Encoder processes, each with its own model replica (0 = encode in-process)")
+    parser.add_argument("--encode_batch", type=int, default=ENCODE_BATCH_SIZE, help="Texts per encoder process batch")
+    parser.add_argument("--no_score_resale", action="store_true",
+                        help="Skip re-running resale scoring after loading datasets that use it")
+    args = parser.parse_args()
+
+    encode_pool = None
+    if args.encode_workers > 0:
+        encode_pool = EncodePool(workers=args.encode_workers, batch_size=args.encode_batch).start()
+        # Each encoder call should keep every process busy.
+        args.embed_batch = max(args.embed_batch, args.encode_workers * args.encode_batch)
+        args.read_batch = max(args.read_batch, args.embed_batch)
+        print(f"[INFO] Encoding with {args.encode_workers} processes "
+              f"(batch={args.encode_batch}, embed_batch={args.embed_batch})")
+
+    pipeline_opts = {
+        "read_batch_size": args.read_batch,
+        "embed_batch_size": args.embed_batch,
+        "upload_batch_size": args.upload_batch,
+        "writers": args.writers,
+        "queue_size": args.queue_size,
+        "upload_parallel": args.upload_parallel,
+        "verbose_upload": args.verbose_upload,
+    }
+    if encode_pool is not None:
+        pipeline_opts["encode_fn"] = encode_pool.encode
+
+    cache = None
+    if not args.no_cache:
+        cache_opts = {"max_entries": args.cache_size} if args.cache_size else {}
+        cache = EmbeddingCache(MODEL_ID, VECTOR_SIZE, path=args.cache_dir, **cache_opts)
+
     client = get_client()
-    
-    # Delete old collections to start fresh
-    try:
-        client.delete_collection(collection_name="clothing")
-        print("Deleted old clothing collection")
-    except:
-        pass
-    
-    try:
-        client.delete_collection(collection_name="watches")
-        print("Deleted old watches collection")
-    except:
-        pass
-    
-    try:
-        client.delete_collection(collection_name="nike_shoes")
-        print("Deleted old nike_shoes collection")
-    except:
-        pass
-    
+
     datasets = {
         "clothing": {
             "path": "data/clothing.parquet",
-            "rename_map": {"title": "name", "subtitle": "description", "price": "price", "category": "category"}
+            "rename_map": {"title": "name", "subtitle": "description", "price": "price", "category": "category"},
+            "profile": "memory-lean"
         },
         "watches": {
             "path": "data/watches.csv",
-            "rename_map": {"name": "name", "description": "description", "price": "price", "category": "category"}
+            "rename_map": {"name": "name", "description": "description", "price": "price", "category": "category"},
+            "profile": "balanced"
         },
         "nike_shoes": {
             "path": "data/nike_shoes.csv",
-            "rename_map": {"name": "name", "description": "description", "price": "price", "category": "category"}
+            "rename_map": {"name": "name", "description": "description", "price": "price", "category": "category"},
+            "key_fields": ["name"],
+            "profile": "low-latency",
+            # predicted_resale/roi from src/resale_model.py, recomputed after every load.
+            "score_resale": True
         }
     }
 
     for collection, config in datasets.items():
-        df = load_dataset(config["path"], config["rename_map"])
-        process_and_upload(client, df, collection)
+        if args.stream:
+            frames = iter_dataset(config["path"], config["rename_map"], args.read_batch)
+        else:
+            frames = load_dataset(config["path"], config["rename_map"])
+        key_fields = config.get("key_fields", KEY_FIELDS)
+        # Tuning profile for newly created collections; see collection_profiles.PROFILES.
+        profile = config.get("profile")
+        rescore = config.get("score_resale", False) and not args.no_score_resale
+        if args.mode == "bluegreen":
+            rebuild_collection(
+                client, frames, collection, key_fields=key_fields, min_recall=args.min_recall,
+                keep_versions=args.keep_versions, rescore=rescore, cache=cache, profile=profile, **pipeline_opts
+            )
+        else:
+            sync_collection(
+                client, frames, collection, mode=args.mode,
+                key_fields=key_fields, rescore=rescore, cache=cache, profile=profile, **pipeline_opts
+            )
+
+    if cache is not None:
+        cache.close()
+    if encode_pool is not None:
+        encode_pool.close()
@@ -1,5 +1,20 @@
+import argparse
+import os
 import socket
+import time
+from functools import lru_cache
 
+import pandas as pd
+from qdrant_client.models import PayloadSelectorExclude
+
+from ar_catalog import get_catalog
+
+PAYLOAD_FIELDS = ["name", "description", "price", "category"]
+# What product cards and result lists render.
+DISPLAY_FIELDS = PAYLOAD_FIELDS + ["ar_model_glb", "ar_model_usdz"]
+
+# Port serve_models.py listens on.
+AR_ASSET_PORT = 9000
 
 def _get_local_ip() -> str:
     s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
@@ -13,35 +28,121 @@ def _get_local_ip() -> str:
     return ip
 
 
+@lru_cache(maxsize=1)
+def asset_base_url() -> str:
+    """
+    Where relative AR asset keys are served from. Resolved once per process:
+    AR_ASSET_BASE_URL if set, otherwise serve_models.py on this machine's LAN IP.
+    """
+    configured = os.getenv("AR_ASSET_BASE_URL")
+    if configured:
+        return configured.rstrip("/")
+    return f"http://{_get_local_ip()}:{AR_ASSET_PORT}"
+
+
+def resolve_asset_url(asset, base_url: str = None):
+    """
+    Turn a stored asset key (e.g. "nike_air_max.glb") into an absolute URL.
+    Absolute URLs (older payloads, external hosts) are returned unchanged.
+    """
+    if not asset:
+        return None
+    asset = str(asset)
+    if asset.startswith(("http://", "https://", "//")):
+        return asset
+    return f"{(base_url or asset_base_url()).rstrip('/')}/{asset.lstrip('/')}"
+
+
+def resolve_ar_urls(payload: dict, base_url: str = None) -> dict:
+    """
+    Copy of `payload` with its AR asset keys resolved to URLs, for serving.
+    """
+    payload = dict(payload)
+    for field in ("ar_model_glb", "ar_model_usdz"):
+        if field in payload:  # projected-out fields stay out
+            payload[field] = resolve_asset_url(payload[field], base_url)
+    return payload
+
+
+def payload_selector(fields=None):
+    """
+    `with_payload` value for a field projection: "name,price" returns only
+    those keys, "-history,-image_embedding" everything but those, and
+    None/"" the whole payload. Raises ValueError when mixing both forms.
+    """
+    if not fields:
+        return True
+    names = [f.strip() for f in (fields.split(",") if isinstance(fields, str) else fields) if f.strip()]
+    exclude = [n[1:] for n in names if n.startswith("-")]
+    include = [n for n in names if not n.startswith("-")]
+    if include and exclude:
+        raise ValueError("fields= either lists fields to include or -fields to exclude, not both")
+    if exclude:
+        return PayloadSelectorExclude(exclude=exclude)
+    return include or True
+
+
 def normalize_payload(row: dict) -> dict:
     """
-    Normalize product data and add AR model URLs for supported products.
-    """
-    product_name = str(row["name"]).strip().lower()
-
-    # Match model manually
-    ar_model_glb = None
-    
-    # Nike Air Max models - serve via local server to avoid CORS issues
-    if "nike air max 90" in product_name or "air max 90" in product_name:
-        # Serve via local server. Automatically detect LAN IP.
-        ip = _get_local_ip()
-        ar_model_glb = f"http://{ip}:9000/nike_air_max.glb"
-    elif "nike" in product_name:
-        # Fallback for other Nike products to use the Air Max model
-        ip = _get_local_ip()
-        ar_model_glb = f"http://{ip}:9000/nike_air_max.glb"
-    # Add more products here as you add more models
-    # elif "adidas" in product_name:
-    #     ar_model_glb = "https://..."
-    # elif "rolex" in product_name:
-    #     ar_model_glb = "https://..."
+    Normalize product data and add AR model asset keys for supported products.
+    Keys are relative (e.g. "nike_air_max.glb"); resolve them with
+    resolve_ar_urls when serving.
+    """
+    # Product -> model mapping lives in data/ar_assets.json; add new models there.
+    asset = get_catalog().match(row["name"]) or {}
 
     return {
         "name": row["name"],
         "description": row["description"],
         "price": row["price"],
         "category": row["category"],
-        "ar_model_glb": ar_model_glb,
-        "ar_model_usdz": None  # Add later if you convert to .usdz
+        "ar_model_glb": asset.get("glb"),
+        "ar_model_usdz": asset.get("usdz"),
     }
+
+
+def build_payloads(df: pd.DataFrame) -> list[dict]:
+    """
+    Columnar equivalent of `[normalize_payload(row) for _, row in df.iterrows()]`.
+
+    Names are lower-cased as a column, each distinct name is matched against
+    the asset catalog once, and records are zipped from whole-column lists
+    rather than built row by row.
+    """
+    if df.empty:
+        return []
+    catalog = get_catalog()
+    keys = df["name"].astype(str).str.strip().str.lower()
+    assets = {name: catalog.match_index(name) for name in keys.unique()}
+    assets = {name: ({} if idx is None else catalog.rules[idx]) for name, idx in assets.items()}
+    matched = [assets[name] for name in keys.tolist()]
+
+    columns = [df[field].tolist() for field in PAYLOAD_FIELDS]
+    columns.append([a.get("glb") for a in matched])
+    columns.append([a.get("usdz") for a in matched])
+    return [dict(zip(DISPLAY_FIELDS, values)) for values in zip(*columns)]
+
+
+def bench(n: int = 100_000, path: str = "data/nike_shoes.csv"):
+    df = pd.read_csv(path)[PAYLOAD_FIELDS].dropna()
+    df = pd.concat([df] * (n // len(df) + 1), ignore_index=True).iloc[:n]
+
+    started = time.perf_counter()
+    rows = [normalize_payload(row) for _, row in df.iterrows()]
+    row_s = time.perf_counter() - started
+
+    started = time.perf_counter()
+    columnar = build_payloads(df)
+    col_s = time.perf_counter() - started
+
+    assert rows == columnar, "columnar payloads differ from normalize_payload"
+    print(f"[BENCH] {n} rows: iterrows {row_s:.2f}s ({n / row_s:,.0f} rows/s), "
+          f"columnar {col_s:.2f}s ({n / col_s:,.0f} rows/s), {row_s / col_s:.1f}x faster")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--bench", type=int, default=100_000, help="Rows to build payloads for")
+    parser.add_argument("--data", type=str, default="data/nike_shoes.csv", help="CSV to replicate for the benchmark")
+    args = parser.parse_args()
+    bench(args.bench, args.data)
@@ -0,0 +1,298 @@
+import argparse
+import queue
+import threading
+import sys
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Iterable
+
+import numpy as np
+import pandas as pd
+
+# Sentinel pushed through the queues once a stage has drained its input.
+_DONE = object()
+
+
+@dataclass
+class Batch:
+    """
+    A slice of rows travelling through the pipeline, enriched stage by stage.
+    `vectors` is an (n, dim) float32 array; upsert slices are views into it.
+    """
+    index: int
+    df: pd.DataFrame
+    payloads: list = None
+    vectors: np.ndarray = None
+
+
+@dataclass
+class StageStats:
+    name: str
+    batches: int = 0
+    items: int = 0
+    busy_seconds: float = 0.0
+    lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def record(self, items: int, seconds: float):
+        with self.lock:
+            self.batches += 1
+            self.items += items
+            self.busy_seconds += seconds
+
+    def summary(self, wall_seconds: float) -> dict:
+        # items_per_s is the stage's own rate while busy (summed across its
+        # threads), so the slowest stage is the one with the lowest number.
+        return {
+            "stage": self.name,
+            "batches": self.batches,
+            "items": self.items,
+            "busy_s": round(self.busy_seconds, 3),
+            "items_per_s": round(self.items / self.busy_seconds, 1) if self.busy_seconds else 0.0,
+            "wall_s": round(wall_seconds, 3),
+        }
+
+
+class PipelineError(RuntimeError):
+    pass
+
+
+def split_frame(df: pd.DataFrame, size: int) -> list[pd.DataFrame]:
+    return [df.iloc[i:i + size] for i in range(0, len(df), size)]
+
+
+class IngestPipeline:
+    """
+    Staged producer/consumer ingestion: read -> payloads -> embed -> upsert.
+
+    Every stage runs in its own thread(s) and talks to the next one through a
+    bounded queue, so a slow stage blocks its producers (backpressure) instead
+    of letting batches pile up in memory. The upsert stage runs `writers`
+    threads so Qdrant round trips overlap with encoding.
+    """
+
+    def __init__(
+        self,
+        embed_fn: Callable[[list[str]], np.ndarray],
+        payload_fn: Callable[[pd.DataFrame], list[dict]],
+        upload_fn: Callable[[Batch], None],
+        read_batch_size: int = 1000,
+        embed_batch_size: int = 100,
+        upload_batch_size: int = 100,
+        writers: int = 4,
+        queue_size: int = 8,
+    ):
+        self.embed_fn = embed_fn
+        self.payload_fn = payload_fn
+        self.upload_fn = upload_fn
+        self.read_batch_size = read_batch_size
+        self.embed_batch_size = embed_batch_size
+        self.upload_batch_size = upload_batch_size
+        self.writers = max(1, writers)
+        self.queue_size = max(1, queue_size)
+        self.stats = {name: StageStats(name) for name in ("read", "payload", "embed", "upsert")}
+        self._stop = threading.Event()
+        self._errors: list[BaseException] = []
+
+    # -- queue helpers -----------------------------------------------------
+    def _put(self, q: queue.Queue, item):
+        while not self._stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _get(self, q: queue.Queue):
+        while not self._stop.is_set():
+            try:
+                return q.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        return _DONE
+
+    def _fail(self, exc: BaseException):
+        self._errors.append(exc)
+        self._stop.set()
+
+    # -- stages ------------------------------------------------------------
+    def _read(self, frames: Iterable[pd.DataFrame], out_q: queue.Queue):
+        try:
+            index = 0
+            it = iter(frames)
+            while True:
+                start = time.perf_counter()
+                frame = next(it, None)
+                if frame is None:
+                    break
+                for part in split_frame(frame, self.read_batch_size):
+                    self.stats["read"].record(len(part), time.perf_counter() - start)
+                    if not self._put(out_q, Batch(index=index, df=part)):
+                        return
+                    index += 1
+                    start = time.perf_counter()
+        except BaseException as e:
+            self._fail(e)
+        finally:
+            self._put(out_q, _DONE)
+
+    def _build_payloads(self, in_q: queue.Queue, out_q: queue.Queue):
+        try:
+            while True:
+                batch = self._get(in_q)
+                if batch is _DONE:
+                    break
+                start = time.perf_counter()
+                batch.payloads = self.payload_fn(batch.df)
+                self.stats["payload"].record(len(batch.df), time.perf_counter() - start)
+                if not self._put(out_q, batch):
+                    return
+        except BaseException as e:
+            self._fail(e)
+        finally:
+            self._put(out_q, _DONE)
+
+    def _embed(self, in_q: queue.Queue, out_q: queue.Queue):
+        try:
+            while True:
+                batch = self._get(in_q)
+                if batch is _DONE:
+                    break
+                start = time.perf_counter()
+                parts = []
+                for part in split_frame(batch.df, self.embed_batch_size):
+                    texts = (part["name"].astype(str) + " " + part["description"].astype(str)).tolist()
+                    parts.append(np.asarray(self.embed_fn(texts), dtype=np.float32))
+                batch.vectors = parts[0] if len(parts) == 1 else np.concatenate(parts)
+                self.stats["embed"].record(len(batch.df), time.perf_counter() - start)
+                if not self._put(out_q, batch):
+                    return
+        except BaseException as e:
+            self._fail(e)
+        finally:
+            # One sentinel per writer so every upsert thread shuts down.
+            for _ in range(self.writers):
+                self._put(out_q, _DONE)
+
+    def _upsert(self, in_q: queue.Queue):
+        try:
+            while True:
+                batch = self._get(in_q)
+                if batch is _DONE:
+                    break
+                for i in range(0, len(batch.df), self.upload_batch_size):
+                    part = Batch(
+                        index=batch.index,
+                        df=batch.df.iloc[i:i + self.upload_batch_size],
+                        payloads=batch.payloads[i:i + self.upload_batch_size],
+                        vectors=batch.vectors[i:i + self.upload_batch_size],
+                    )
+                    start = time.perf_counter()
+                    self.upload_fn(part)
+                    self.stats["upsert"].record(len(part.df), time.perf_counter() - start)
+        except BaseException as e:
+            self._fail(e)
+
+    # -- driver ------------------------------------------------------------
+    def run(self, frames: Iterable[pd.DataFrame]) -> list[dict]:
+        """
+        Push every frame through the pipeline and block until all upserts land.
+        Returns per-stage throughput; raises PipelineError if any stage failed.
+        """
+        read_q = queue.Queue(maxsize=self.queue_size)
+        payload_q = queue.Queue(maxsize=self.queue_size)
+        embed_q = queue.Queue(maxsize=self.queue_size)
+
+        threads = [
+            threading.Thread(target=self._read, args=(frames, read_q), name="ingest-read"),
+            threading.Thread(target=self._build_payloads, args=(read_q, payload_q), name="ingest-payload"),
+            threading.Thread(target=self._embed, args=(payload_q, embed_q), name="ingest-embed"),
+        ]
+        threads += [
+            threading.Thread(target=self._upsert, args=(embed_q,), name=f"ingest-upsert-{i}")
+            for i in range(self.writers)
+        ]
+
+        started = time.perf_counter()
+        for t in threads:
+            t.daemon = True
+            t.start()
+        for t in threads:
+            t.join()
+        wall = time.perf_counter() - started
+
+        if self._errors:
+            raise PipelineError(f"Ingestion failed: {self._errors[0]!r}") from self._errors[0]
+
+        return [s.summary(wall) for s in self.stats.values()]
+
+
+def print_stats(collection: str, stats: list[dict]):
+    wall = stats[0]["wall_s"] if stats else 0.0
+    total = stats[-1]["items"] if stats else 0
+    rate = total / wall if wall else 0.0
+    print(f"[INFO] Pipeline throughput for {collection}: {total} items in {wall:.2f}s ({rate:.1f} items/s)")
+    for s in stats:
+        print(
+            f"  {s['stage']:<8} batches={s['batches']:<6} items={s['items']:<8} "
+            f"busy={s['busy_s']:>8.2f}s  {s['items_per_s']:>10.1f} items/s"
+        )
+
+
+def bench(n: int = 100_000, dim: int = 384, upload_n: int = 10_000, batch_size: int = 100, live: bool = False):
+    """
+    Memory of n vectors as Python lists vs one float32 array, and upsert
+    throughput of per-point PointStruct lists vs columnar array batches.
+    """
+    import uuid
+
+    from qdrant_client import QdrantClient
+    from qdrant_client.models import PointStruct
+    from qdrant_utils import create_collection, get_client, upload_batch
+
+    vectors = np.random.default_rng(0).standard_normal((n, dim), dtype=np.float32)
+    as_lists = vectors.tolist()
+    # Outer list + one list per vector + one boxed float per component.
+    list_bytes = (sys.getsizeof(as_lists) + sum(sys.getsizeof(row) for row in as_lists)
+                  + vectors.size * sys.getsizeof(0.0))
+    del as_lists
+    print(f"[BENCH] {n} x {dim} vectors: lists={list_bytes / 2**20:8.1f} MiB  "
+          f"float32 array={vectors.nbytes / 2**20:8.1f} MiB  ({list_bytes / vectors.nbytes:.1f}x)")
+
+    client = get_client() if live else QdrantClient(location=":memory:")
+    collection = "bench_vector_path"
+    vectors = vectors[:upload_n]
+    ids = [str(uuid.uuid4()) for _ in range(len(vectors))]
+    payloads = [{"i": i} for i in range(len(vectors))]
+
+    def legacy(lo, hi):
+        points = [PointStruct(id=pid, vector=vec, payload=payload)
+                  for pid, vec, payload in zip(ids[lo:hi], vectors[lo:hi].tolist(), payloads[lo:hi])]
+        client.upsert(collection_name=collection, points=points)
+
+    def columnar(lo, hi):
+        upload_batch(client, collection, vectors[lo:hi], payloads[lo:hi], ids=ids[lo:hi])
+
+    try:
+        for name, fn in (("pointstruct", legacy), ("columnar", columnar)):
+            if client.collection_exists(collection_name=collection):
+                client.delete_collection(collection_name=collection)
+            create_collection(client, collection, dim)
+            started = time.perf_counter()
+            for lo in range(0, len(vectors), batch_size):
+                fn(lo, lo + batch_size)
+            elapsed = time.perf_counter() - started
+            print(f"[BENCH] upsert {name:<12} {len(vectors)} points in {elapsed:6.2f}s "
+                  f"({len(vectors) / elapsed:10.1f} points/s)")
+    finally:
+        client.delete_collection(collection_name=collection)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--n", type=int, default=100_000, help="Vectors for the memory comparison")
+    parser.add_argument("--upload_n", type=int, default=10_000, help="Vectors upserted per upload path")
+    parser.add_argument("--batch_size", type=int, default=100, help="Points per upsert")
+    parser.add_argument("--live", action="store_true", help="Upsert into the configured Qdrant instead of :memory:")
+    args = parser.parse_args()
+    bench(args.n, upload_n=args.upload_n, batch_size=args.batch_size, live=args.live)
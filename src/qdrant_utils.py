@@ -1,40 +1,646 @@
 import os
+import re
+import threading
+import time
 import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from pathlib import Path
+import httpx
+import numpy as np
 from dotenv import load_dotenv
-from qdrant_client import QdrantClient
-from qdrant_client.models import VectorParams, Distance, PointStruct
+from collection_profiles import DEFAULT_PROFILE, PROFILES, collection_config, search_params
+from search_filters import FILTER_FIELDS
+from qdrant_client import AsyncQdrantClient, QdrantClient
+from qdrant_client.http.exceptions import ResponseHandlingException
+from qdrant_client.models import (
+    Batch, PointIdsList, SetPayload, SetPayloadOperation,
+    CreateAlias, CreateAliasOperation, DeleteAlias, DeleteAliasOperation, CollectionStatus,
+)
 
 # Load .env file - search from current directory up
 load_dotenv()
 
-def get_client():
+DEFAULT_QDRANT_HOST = "https://dfd0b68f-16b0-481c-93f7-0efd4d2b121b.us-east4-0.gcp.cloud.qdrant.io"
+
+def client_config() -> dict:
+    """
+    Connection settings, read once from the environment:
+    QDRANT_HOST, QDRANT_API_KEY, QDRANT_PREFER_GRPC, QDRANT_TIMEOUT,
+    QDRANT_POOL_SIZE and QDRANT_KEEPALIVE_S.
+    """
     qdrant_host = os.getenv("QDRANT_HOST")
     qdrant_api_key = os.getenv("QDRANT_API_KEY")
 
     # Host can be defaulted for convenience, but API key should never be hardcoded.
     if not qdrant_host:
-        qdrant_host = "https://dfd0b68f-16b0-481c-93f7-0efd4d2b121b.us-east4-0.gcp.cloud.qdrant.io"
+        qdrant_host = DEFAULT_QDRANT_HOST
 
     if not qdrant_api_key:
         raise RuntimeError(
             "Missing QDRANT_API_KEY. Set it in your environment or a local .env file (not committed)."
         )
 
-    print(f"DEBUG: Qdrant host={qdrant_host}")
+    return {
+        "url": qdrant_host,
+        "api_key": qdrant_api_key,
+        "prefer_grpc": os.getenv("QDRANT_PREFER_GRPC", "false").lower() in ("1", "true", "yes"),
+        "timeout": int(os.getenv("QDRANT_TIMEOUT", "30")),
+        "pool_size": int(os.getenv("QDRANT_POOL_SIZE", "32")),
+        "keepalive_s": float(os.getenv("QDRANT_KEEPALIVE_S", "60")),
+    }
+
+_client = None
+_client_lock = threading.Lock()
+_stats_lock = threading.Lock()
+_client_stats = {
+    "created": 0,
+    "reconnects": 0,
+    "requests": 0,
+    "in_flight": 0,
+    "errors": 0,
+    "request_seconds": 0.0,
+    "health_checks": 0,
+    "health_failures": 0,
+    "last_health_ms": None,
+}
+
+@contextmanager
+def _track_request():
+    with _stats_lock:
+        _client_stats["requests"] += 1
+        _client_stats["in_flight"] += 1
+    started = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        with _stats_lock:
+            _client_stats["errors"] += 1
+        raise
+    finally:
+        with _stats_lock:
+            _client_stats["in_flight"] -= 1
+            _client_stats["request_seconds"] += time.perf_counter() - started
+
+def _track_status(response):
+    if response.status_code >= 500:
+        with _stats_lock:
+            _client_stats["errors"] += 1
+    return response
+
+class _PooledTransport(httpx.HTTPTransport):
+    """
+    Keep-alive HTTP transport that also counts requests for client_metrics().
+    """
+
+    def handle_request(self, request):
+        with _track_request():
+            return _track_status(super().handle_request(request))
+
+class _AsyncPooledTransport(httpx.AsyncHTTPTransport):
+    async def handle_async_request(self, request):
+        with _track_request():
+            return _track_status(await super().handle_async_request(request))
+
+def _pool_limits(config: dict) -> httpx.Limits:
+    pool = config["pool_size"]
+    return httpx.Limits(max_connections=pool, max_keepalive_connections=pool, keepalive_expiry=config["keepalive_s"])
+
+def create_client(config: dict = None) -> QdrantClient:
+    """
+    Build a new client with a keep-alive connection pool. Most code should
+    use get_client() and share the process-wide instance instead.
+    """
+    config = config or client_config()
+    pool = config["pool_size"]
+    client = QdrantClient(
+        url=config["url"],
+        api_key=config["api_key"],
+        https=config["url"].startswith("https"),
+        prefer_grpc=config["prefer_grpc"],
+        timeout=config["timeout"],
+        # REST only; gRPC multiplexes calls over a single channel.
+        transport=_PooledTransport(limits=_pool_limits(config), retries=1),
+    )
+    with _stats_lock:
+        _client_stats["created"] += 1
+    print(f"[INFO] Qdrant client ready host={config['url']} grpc={config['prefer_grpc']} pool={pool}")
+    return client
+
+def get_client():
+    """
+    Process-wide Qdrant client shared by ingestion, the CLI, the Streamlit
+    apps and the web server. Created on first use.
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = create_client()
+    return _client
+
+def close_client():
+    global _client
+    with _client_lock:
+        if _client is not None:
+            _client.close()
+            _client = None
+
+_async_client = None
+
+def get_async_client() -> AsyncQdrantClient:
+    """
+    Process-wide AsyncQdrantClient for the async web endpoints; same settings as get_client().
+    Must be used from a single event loop.
+    """
+    global _async_client
+    if _async_client is None:
+        config = client_config()
+        _async_client = AsyncQdrantClient(
+            url=config["url"],
+            api_key=config["api_key"],
+            https=config["url"].startswith("https"),
+            prefer_grpc=config["prefer_grpc"],
+            timeout=config["timeout"],
+            transport=_AsyncPooledTransport(limits=_pool_limits(config), retries=1),
+        )
+    return _async_client
+
+async def close_async_client():
+    global _async_client
+    if _async_client is not None:
+        await _async_client.close()
+        _async_client = None
+
+def check_health(client=None) -> bool:
+    client = client or get_client()
+    with _stats_lock:
+        _client_stats["health_checks"] += 1
+    started = time.perf_counter()
+    try:
+        client.get_collections()
+    except Exception:
+        with _stats_lock:
+            _client_stats["health_failures"] += 1
+        return False
+    _client_stats["last_health_ms"] = round((time.perf_counter() - started) * 1000, 2)
+    return True
+
+def reconnect(max_retries: int = 5, backoff: float = 0.5, max_backoff: float = 10.0):
+    """
+    Replace the shared client and retry with exponential backoff until it passes a health check.
+    """
+    global _client
+    delay = backoff
+    for attempt in range(1, max_retries + 1):
+        with _client_lock:
+            old, _client = _client, None
+        if old is not None:
+            try:
+                old.close()
+            except Exception:
+                pass
+        with _stats_lock:
+            _client_stats["reconnects"] += 1
+        try:
+            client = get_client()
+            if check_health(client):
+                return client
+        except Exception as e:
+            print(f"[WARN] Qdrant reconnect attempt {attempt} failed: {e}")
+        time.sleep(delay)
+        delay = min(delay * 2, max_backoff)
+    raise RuntimeError(f"Could not reconnect to Qdrant after {max_retries} attempts")
+
+def is_connection_error(exc: BaseException) -> bool:
+    """
+    True for a dropped or refused connection (worth reconnecting), as
+    opposed to an error response from a healthy server.
+    """
+    if isinstance(exc, ResponseHandlingException):
+        exc = getattr(exc, "source", None) or exc
+    # Read timeouts are left out: a slow query is not a dead connection.
+    return isinstance(exc, (httpx.NetworkError, httpx.RemoteProtocolError, httpx.ConnectTimeout, ConnectionError))
 
-    return QdrantClient(url=qdrant_host, api_key=qdrant_api_key, https=True)
+def call_with_reconnect(fn):
+    """
+    fn(client) on the shared client; after a connection error, reconnect
+    with backoff and retry once.
+    """
+    try:
+        return fn(get_client())
+    except Exception as e:
+        if not is_connection_error(e):
+            raise
+        print(f"[WARN] Qdrant connection lost ({e}); reconnecting")
+        return fn(reconnect())
 
-def create_collection(client, collection_name: str, vector_size: int):
+def reset_async_client():
+    """
+    Drop the shared async client so the next get_async_client() builds a
+    fresh one; returns the old client for the caller to close.
+    """
+    global _async_client
+    old, _async_client = _async_client, None
+    return old
+
+def client_metrics() -> dict:
+    try:
+        config = client_config()
+    except RuntimeError:
+        config = {}
+    with _stats_lock:
+        stats = dict(_client_stats)
+    request_seconds = stats.pop("request_seconds")
+    stats["avg_request_ms"] = round(1000 * request_seconds / stats["requests"], 2) if stats["requests"] else 0.0
+    stats["connected"] = _client is not None
+    stats["async_connected"] = _async_client is not None
+    stats["prefer_grpc"] = config.get("prefer_grpc")
+    stats["pool_size"] = config.get("pool_size")
+    return stats
+
+def create_collection(client, collection_name: str, vector_size: int, profile: str = None):
+    """
+    Create the collection under a tuning profile (see collection_profiles).
+    The profile name is kept in the collection metadata so searches can
+    pick matching query parameters. Existing collections (or the alias
+    target, for blue/green names) are left alone apart from missing indexes.
+    """
+    target = resolve_alias(client, collection_name)
+    if target:
+        ensure_payload_indexes(client, target)
+        return
     if not client.collection_exists(collection_name=collection_name):
-        client.recreate_collection(
+        profile = profile or DEFAULT_PROFILE
+        client.create_collection(
+            collection_name=collection_name,
+            metadata={"profile": profile, "data_version": new_data_version()},
+            **collection_config(vector_size, profile),
+        )
+        print(f"[INFO] Created {collection_name} with profile {profile}")
+    ensure_payload_indexes(client, collection_name)
+
+def ensure_payload_indexes(client, collection_name: str, fields: dict = None):
+    """
+    Create the payload indexes filtered search relies on (search_filters.FILTER_FIELDS)
+    that the collection doesn't have yet. Returns the fields it indexed.
+    """
+    fields = fields or FILTER_FIELDS
+    existing = client.get_collection(collection_name).payload_schema or {}
+    created = []
+    for field, schema in fields.items():
+        if field not in existing:
+            client.create_payload_index(collection_name=collection_name, field_name=field, field_schema=schema)
+            created.append(field)
+    if created:
+        print(f"[INFO] Indexed payload fields on {collection_name}: {', '.join(created)}")
+    return created
+
+_search_params: dict = {}
+SEARCH_PARAMS_TTL = 60.0
+
+def get_search_params(client, collection_name: str):
+    """
+    SearchParams for the profile `collection_name` (or its alias target) was
+    created with; None for collections created before profiles existed.
+    """
+    cached = _search_params.get(collection_name)
+    if cached is not None and time.monotonic() - cached[1] < SEARCH_PARAMS_TTL:
+        return cached[0]
+    metadata = getattr(client.get_collection(collection_name).config, "metadata", None) or {}
+    profile = metadata.get("profile")
+    params = search_params(profile) if profile in PROFILES else None
+    _search_params[collection_name] = (params, time.monotonic())
+    return params
+
+# Fixed namespace so the same product key always maps to the same point ID.
+POINT_ID_NAMESPACE = uuid.UUID("8f0c6a52-3d3e-4b8e-9f61-2a4f6c1d7e90")
+
+def point_id(product_key: str) -> str:
+    return str(uuid.uuid5(POINT_ID_NAMESPACE, product_key))
+
+def upload_batch(client, collection_name: str, vectors, payloads: list[dict], ids: list[str] = None):
+    """
+    Upsert one columnar batch. `vectors` is an (n, dim) float32 array (or a
+    list of lists); it is converted to lists once, at the request boundary,
+    instead of being wrapped point by point.
+    """
+    # Without explicit IDs every upload creates new points (legacy behaviour).
+    if ids is None:
+        ids = [str(uuid.uuid4()) for _ in payloads]
+    if isinstance(vectors, np.ndarray):
+        vectors = vectors.tolist()
+    client.upsert(collection_name=collection_name, points=Batch(ids=list(ids), vectors=vectors, payloads=payloads))
+
+def set_payloads(client, collection_name: str, ids: list[str], payloads: list[dict], batch_size: int = 256):
+    """
+    Update payloads in place (no re-embedding), one request per batch.
+    """
+    for i in range(0, len(ids), batch_size):
+        operations = [
+            SetPayloadOperation(set_payload=SetPayload(payload=payload, points=[pid]))
+            for pid, payload in zip(ids[i:i + batch_size], payloads[i:i + batch_size])
+        ]
+        client.batch_update_points(collection_name=collection_name, update_operations=operations)
+
+def new_data_version() -> str:
+    # Random rather than a counter: a dropped and recreated collection must not
+    # come back with a token that cached results were stored under.
+    return uuid.uuid4().hex
+
+def get_data_version(client, collection_name: str) -> str:
+    """
+    Opaque token that changes whenever the data behind `collection_name` does:
+    the physical collection (alias target) plus a value written when it is
+    created and replaced on every ingestion bump.
+    """
+    target = resolve_alias(client, collection_name) or collection_name
+    metadata = getattr(client.get_collection(target).config, "metadata", None) or {}
+    return f"{target}:{metadata.get('data_version', 0)}"
+
+def bump_data_version(client, collection_name: str):
+    target = resolve_alias(client, collection_name) or collection_name
+    client.update_collection(collection_name=target, metadata={"data_version": new_data_version()})
+
+def delete_points(client, collection_name: str, ids: list[str], batch_size: int = 1000):
+    for i in range(0, len(ids), batch_size):
+        client.delete(
             collection_name=collection_name,
-            vectors_config=VectorParams(size=vector_size, distance=Distance.COSINE)
+            points_selector=PointIdsList(points=ids[i:i + batch_size]),
         )
 
-def upload_batch(client, collection_name: str, vectors: list[list[float]], payloads: list[dict]):
-    points = [
-        PointStruct(id=str(uuid.uuid4()), vector=vec, payload=payload)
-        for vec, payload in zip(vectors, payloads)
-    ]
-    client.upsert(collection_name=collection_name, points=points)
+
+# ---------------------------------------------------------------------------
+# Bulk upload: parallel wait=False upserts with adaptive batches and retries.
+
+UPLOAD_PARALLEL = int(os.getenv("QDRANT_UPLOAD_PARALLEL", "4"))
+# Qdrant rejects REST bodies over 32 MiB by default; stay well under it.
+UPLOAD_MAX_REQUEST_BYTES = int(os.getenv("QDRANT_UPLOAD_MAX_BYTES", str(16 * 2**20)))
+
+
+def _is_retryable(exc: Exception) -> bool:
+    # Connection errors and timeouts carry no status; bad input does not go away on retry.
+    if isinstance(exc, (ValueError, TypeError)):
+        return False
+    status = getattr(exc, "status_code", None)
+    return status is None or status == 429 or status >= 500
+
+
+class BulkUploader:
+    """
+    Upserts large point sets with `parallel` concurrent wait=False requests.
+
+    The batch size adapts after every request: it grows or shrinks towards
+    `target_latency` seconds per request and is capped so one request stays
+    under `max_request_bytes`. Transient failures are retried with
+    exponential backoff; a 413 splits the batch. Since writes are only
+    acknowledged, finish() waits until they are applied.
+
+    Requests run on threads sharing the pooled client. The client's own
+    upload_collection(parallel=N) forks processes, which cannot share it.
+    """
+
+    def __init__(self, client, collection_name: str, parallel: int = UPLOAD_PARALLEL, batch_size: int = 256,
+                 min_batch_size: int = 16, max_batch_size: int = 4096, target_latency: float = 0.5,
+                 max_request_bytes: int = UPLOAD_MAX_REQUEST_BYTES, max_retries: int = 5, backoff: float = 0.5,
+                 max_backoff: float = 10.0, verbose: bool = False):
+        self.client = client
+        self.collection_name = collection_name
+        self.parallel = max(1, parallel)
+        self.batch_size = batch_size
+        self.min_batch_size = min_batch_size
+        self.max_batch_size = max_batch_size
+        self.target_latency = target_latency
+        self.max_request_bytes = max_request_bytes
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.verbose = verbose
+        self.records: list[dict] = []
+        self.retries = 0
+        self._probes: list = []
+        self._started = None
+        self._finished = None
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=self.parallel, thread_name_prefix="qdrant-upload")
+
+    # -- sizing ------------------------------------------------------------
+    def _request_cap(self, vectors, payloads) -> int:
+        # JSON floats run ~10 bytes each; payload size from a small sample.
+        sample = payloads[:8]
+        payload_bytes = sum(len(repr(p)) for p in sample) / max(1, len(sample))
+        per_point = 10 * (vectors.shape[1] if isinstance(vectors, np.ndarray) else len(vectors[0])) + payload_bytes + 64
+        return max(1, int(self.max_request_bytes // per_point))
+
+    def _adapt(self, points: int, seconds: float):
+        with self._lock:
+            if seconds <= 0:
+                return
+            # Move halfway towards the size that would hit the target latency.
+            ideal = points * self.target_latency / seconds
+            size = int((self.batch_size + ideal) / 2)
+            self.batch_size = max(self.min_batch_size, min(self.max_batch_size, size))
+
+    # -- requests ----------------------------------------------------------
+    def _send(self, ids: list, vectors, payloads: list[dict]):
+        delay = self.backoff
+        for attempt in range(1, self.max_retries + 1):
+            started = time.perf_counter()
+            try:
+                self.client.upsert(
+                    collection_name=self.collection_name,
+                    points=Batch(ids=ids, vectors=vectors.tolist() if isinstance(vectors, np.ndarray) else vectors,
+                                 payloads=payloads),
+                    wait=False,
+                )
+            except Exception as e:
+                if getattr(e, "status_code", None) == 413 and len(ids) > 1:
+                    with self._lock:
+                        # Never grow back to a size the server refused.
+                        self.max_batch_size = max(self.min_batch_size, min(self.max_batch_size, len(ids) // 2))
+                        self.batch_size = min(self.batch_size, self.max_batch_size)
+                    half = len(ids) // 2
+                    self._send(ids[:half], vectors[:half], payloads[:half])
+                    self._send(ids[half:], vectors[half:], payloads[half:])
+                    return
+                if attempt == self.max_retries or not _is_retryable(e):
+                    raise
+                with self._lock:
+                    self.retries += 1
+                print(f"[WARN] Upsert of {len(ids)} points into {self.collection_name} failed "
+                      f"(attempt {attempt}/{self.max_retries}): {e}")
+                time.sleep(delay)
+                delay = min(delay * 2, self.max_backoff)
+                continue
+
+            seconds = time.perf_counter() - started
+            self._adapt(len(ids), seconds)
+            record = {"points": len(ids), "latency_s": round(seconds, 4), "attempts": attempt,
+                      "points_per_s": round(len(ids) / seconds, 1) if seconds else 0.0}
+            with self._lock:
+                self.records.append(record)
+                # Last point of the batch, re-sent with wait=True by finish(). The
+                # vector is copied: a row view would keep the whole batch alive.
+                self._probes.append((ids[-1], np.array(vectors[-1], dtype=np.float32), payloads[-1]))
+                self._finished = time.perf_counter()
+            if self.verbose:
+                print(f"[UPLOAD] {self.collection_name} batch={record['points']:<5} "
+                      f"latency={seconds * 1000:8.1f} ms  {record['points_per_s']:>10.1f} points/s")
+            return
+
+    def upload(self, vectors, payloads: list[dict], ids: list = None):
+        """
+        Upsert every point and block until all requests are acknowledged.
+        Safe to call from several threads; sizing state is shared.
+        """
+        if ids is None:
+            ids = [str(uuid.uuid4()) for _ in payloads]
+        ids = list(ids)
+        if self._started is None:
+            self._started = time.perf_counter()
+        cap = self._request_cap(vectors, payloads) if len(ids) else 1
+        futures = []
+        start = 0
+        while start < len(ids):
+            size = min(self.batch_size, cap)
+            end = start + size
+            futures.append(self._executor.submit(self._send, ids[start:end], vectors[start:end], payloads[start:end]))
+            start = end
+        for future in futures:
+            future.result()
+
+    def finish(self) -> bool:
+        """
+        Consistency wait: block until every acknowledged write is applied.
+
+        Checking that points exist proves nothing when ids are deterministic
+        (re-synced points existed before the upload), so the last point of
+        each batch is written again, identically, with wait=True. A shard
+        applies updates in order, so once that write returns, every earlier
+        batch touching the same shards has been applied too.
+        """
+        with self._lock:
+            probes = list({str(pid): (pid, vector, payload) for pid, vector, payload in self._probes}.values())
+        for i in range(0, len(probes), 1000):
+            chunk = probes[i:i + 1000]
+            vectors = [v.tolist() for _, v, _ in chunk]
+            try:
+                self.client.upsert(
+                    collection_name=self.collection_name,
+                    points=Batch(ids=[pid for pid, _, _ in chunk], vectors=vectors, payloads=[p for _, _, p in chunk]),
+                    wait=True,
+                )
+            except Exception as e:
+                print(f"[WARN] Consistency wait on {self.collection_name} failed: {e}")
+                return False
+        return True
+
+    def stats(self) -> dict:
+        with self._lock:
+            records = list(self.records)
+        points = sum(r["points"] for r in records)
+        latencies = np.array([r["latency_s"] for r in records]) if records else np.zeros(1)
+        wall = self._finished - self._started if self._finished else 0.0
+        return {
+            "points": points,
+            "batches": len(records),
+            "retries": self.retries,
+            "batch_size": self.batch_size,
+            "latency_p50_ms": round(float(np.percentile(latencies, 50)) * 1000, 1),
+            "latency_p95_ms": round(float(np.percentile(latencies, 95)) * 1000, 1),
+            "latency_max_ms": round(float(latencies.max()) * 1000, 1),
+            "points_per_s": round(points / wall, 1) if wall else 0.0,
+        }
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+
+
+# ---------------------------------------------------------------------------
+# Blue/green reindexing: build "<name>_v<N>", then repoint the "<name>" alias.
+
+def resolve_alias(client, alias: str):
+    """
+    Return the collection an alias points to, or None if it isn't an alias.
+    """
+    for a in client.get_aliases().aliases:
+        if a.alias_name == alias:
+            return a.collection_name
+    return None
+
+def list_versions(client, base: str) -> list[tuple[int, str]]:
+    pattern = re.compile(rf"^{re.escape(base)}_v(\d+)$")
+    versions = []
+    for c in client.get_collections().collections:
+        m = pattern.match(c.name)
+        if m:
+            versions.append((int(m.group(1)), c.name))
+    return sorted(versions)
+
+def next_version_name(client, base: str) -> str:
+    versions = list_versions(client, base)
+    return f"{base}_v{versions[-1][0] + 1 if versions else 1}"
+
+def wait_until_ready(client, collection_name: str, timeout: float = 600.0, poll: float = 1.0):
+    # Green means the optimizers are idle and the HNSW index is fully built.
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if client.get_collection(collection_name).status == CollectionStatus.GREEN:
+            return True
+        time.sleep(poll)
+    return False
+
+def sample_points(client, collection_name: str, limit: int = 50):
+    points, _ = client.scroll(collection_name=collection_name, limit=limit, with_payload=True, with_vectors=True)
+    return points
+
+def warm_up(client, collection_name: str, vectors: list, rounds: int = 2, top_k: int = 10):
+    # Touch the index and payload storage so the first real queries don't pay for page faults.
+    for _ in range(rounds):
+        for vec in vectors:
+            client.query_points(collection_name=collection_name, query=vec, limit=top_k, with_payload=True)
+
+def recall_check(client, old_collection: str, new_collection: str, sample: int = 50, top_k: int = 10) -> float:
+    """
+    Query the new collection with vectors sampled from the old one and
+    return the fraction whose product (by name) comes back in the top_k.
+    """
+    points = sample_points(client, old_collection, sample)
+    if not points:
+        return 1.0
+    found = 0
+    for p in points:
+        hits = client.query_points(
+            collection_name=new_collection, query=p.vector, limit=top_k, with_payload=["name"]
+        ).points
+        name = (p.payload or {}).get("name")
+        if any(h.id == p.id or (h.payload or {}).get("name") == name for h in hits):
+            found += 1
+    return found / len(points)
+
+def swap_alias(client, alias: str, collection_name: str):
+    """
+    Atomically point `alias` at `collection_name`.
+    """
+    if client.collection_exists(collection_name=alias) and resolve_alias(client, alias) is None:
+        # One-time migration: a plain collection still owns the alias name.
+        print(f"[WARN] Replacing plain collection '{alias}' with an alias; searches fail until the alias exists")
+        client.delete_collection(collection_name=alias)
+    operations = []
+    if resolve_alias(client, alias):
+        operations.append(DeleteAliasOperation(delete_alias=DeleteAlias(alias_name=alias)))
+    operations.append(CreateAliasOperation(create_alias=CreateAlias(collection_name=collection_name, alias_name=alias)))
+    client.update_collection_aliases(change_aliases_operations=operations)
+
+def gc_versions(client, base: str, keep: int = 2) -> list[str]:
+    """
+    Drop old "<base>_v<N>" collections, keeping the newest `keep` and whatever the alias serves.
+    """
+    live = resolve_alias(client, base)
+    versions = [name for _, name in list_versions(client, base)]
+    removed = []
+    for name in versions[:-keep] if keep else versions:
+        if name != live:
+            client.delete_collection(collection_name=name)
+            removed.append(name)
+    return removed
@@ -0,0 +1,160 @@
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable
+
+import numpy as np
+
+DEFAULT_MAXSIZE = int(os.getenv("QUERY_CACHE_SIZE", "10000"))
+DEFAULT_TTL = float(os.getenv("QUERY_CACHE_TTL", "86400"))
+# Max rows kept in the SQLite file; least recently used are evicted beyond it.
+DEFAULT_DISK_MAXSIZE = int(os.getenv("QUERY_CACHE_DISK_SIZE", "100000"))
+# Set QUERY_CACHE_PATH to keep cached query vectors across restarts.
+DEFAULT_PATH = os.getenv("QUERY_CACHE_PATH") or None
+
+
+def normalize_query(text: str) -> str:
+    # MiniLM's tokenizer lower-cases anyway, so case and spacing variants share an entry.
+    return " ".join(str(text).lower().split())
+
+
+class QueryEmbeddingCache:
+    """
+    LRU + TTL cache of query embeddings keyed by the normalized query text,
+    optionally written through to a local SQLite file. The file is bounded
+    too: past `disk_maxsize` rows the least recently stored or loaded
+    queries are evicted, and expired rows are dropped on open.
+    """
+
+    def __init__(self, maxsize: int = DEFAULT_MAXSIZE, ttl: float = DEFAULT_TTL, path: str = DEFAULT_PATH,
+                 disk_maxsize: int = DEFAULT_DISK_MAXSIZE):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.disk_maxsize = max(1, disk_maxsize)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._disk_entries = 0
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        if path:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS queries (query TEXT PRIMARY KEY, vector BLOB NOT NULL, created REAL NOT NULL)"
+            )
+            columns = {row[1] for row in self._db.execute("PRAGMA table_info(queries)")}
+            if "last_used" not in columns:  # files written before eviction existed
+                self._db.execute("ALTER TABLE queries ADD COLUMN last_used REAL NOT NULL DEFAULT 0")
+                self._db.execute("UPDATE queries SET last_used = created")
+            self._db.execute("CREATE INDEX IF NOT EXISTS queries_last_used ON queries (last_used)")
+            if self.ttl > 0:
+                self._db.execute("DELETE FROM queries WHERE created < ?", (time.time() - self.ttl,))
+            self._disk_entries = self._db.execute("SELECT COUNT(*) FROM queries").fetchone()[0]
+            self._evict_disk(0)
+            self._db.commit()
+
+    @property
+    def persistent(self) -> bool:
+        # get and put hit SQLite (and commit) when the cache is file-backed.
+        return self._db is not None
+
+    def _expired(self, created: float) -> bool:
+        return self.ttl > 0 and time.time() - created > self.ttl
+
+    def get(self, text: str):
+        key = normalize_query(text)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and not self._expired(entry[1]):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            if entry is not None:
+                del self._entries[key]
+            if self._db is not None:
+                row = self._db.execute("SELECT vector, created FROM queries WHERE query = ?", (key,)).fetchone()
+                if row is not None and not self._expired(row[1]):
+                    vector = np.frombuffer(row[0], dtype=np.float32).tolist()
+                    self._store(key, vector, row[1])
+                    self._db.execute("UPDATE queries SET last_used = ? WHERE query = ?", (time.time(), key))
+                    self._db.commit()
+                    self.hits += 1
+                    return vector
+            self.misses += 1
+            return None
+
+    def put(self, text: str, vector):
+        key = normalize_query(text)
+        vector = list(vector)
+        created = time.time()
+        with self._lock:
+            self._store(key, vector, created)
+            if self._db is not None:
+                exists = self._db.execute("SELECT 1 FROM queries WHERE query = ?", (key,)).fetchone() is not None
+                if not exists:
+                    self._evict_disk(1)
+                    self._disk_entries += 1
+                self._db.execute(
+                    "INSERT OR REPLACE INTO queries (query, vector, created, last_used) VALUES (?, ?, ?, ?)",
+                    (key, np.asarray(vector, dtype=np.float32).tobytes(), created, created),
+                )
+                self._db.commit()
+
+    def _evict_disk(self, incoming: int):
+        # Make room for `incoming` new rows by dropping the least recently used ones.
+        excess = self._disk_entries + incoming - self.disk_maxsize
+        if excess > 0:
+            self._db.execute(
+                "DELETE FROM queries WHERE query IN (SELECT query FROM queries ORDER BY last_used ASC LIMIT ?)",
+                (excess,),
+            )
+            self._disk_entries -= excess
+            self.evictions += excess
+
+    def _store(self, key: str, vector, created: float):
+        self._entries[key] = (vector, created)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def get_or_compute(self, text: str, encode_fn: Callable[[str], list]):
+        vector = self.get(text)
+        if vector is None:
+            vector = encode_fn(normalize_query(text))
+            self.put(text, vector)
+        return vector
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "maxsize": self.maxsize,
+            "ttl_s": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+            "persistent": self._db is not None,
+            "disk_entries": self._disk_entries,
+            "disk_maxsize": self.disk_maxsize,
+            "evictions": self.evictions,
+        }
+
+
+_shared: QueryEmbeddingCache | None = None
+_shared_lock = threading.Lock()
+
+
+def get_query_cache() -> QueryEmbeddingCache:
+    """
+    Process-wide cache shared by the CLI, the Streamlit apps and the web API.
+    """
+    global _shared
+    if _shared is None:
+        with _shared_lock:
+            if _shared is None:
+                _shared = QueryEmbeddingCache()
+    return _shared
@@ -0,0 +1,174 @@
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+
+def parse_weights(spec) -> dict[str, float]:
+    """
+    Investment weights from "roi=0.6,liquidity=0.3,volatility=-0.1" or a
+    dict; negative weights penalise a field.
+    """
+    if isinstance(spec, dict):
+        return {field: float(w) for field, w in spec.items()}
+    weights = {}
+    for clause in filter(None, (c.strip() for c in (spec or "").split(","))):
+        field, _, value = clause.partition("=")
+        try:
+            weights[field.strip()] = float(value)
+        except ValueError:
+            raise ValueError(f"Cannot parse weight '{clause}' (expected field=number)") from None
+    return weights
+
+
+# Composite investment score from the ROADMAP: 0.6*roi + 0.3*liquidity - 0.1*volatility.
+INVESTMENT_WEIGHTS = parse_weights(os.getenv("INVESTMENT_WEIGHTS", "roi=0.6,liquidity=0.3,volatility=-0.1"))
+# Share of the final score that comes from semantic similarity (the rest is investment).
+SEMANTIC_WEIGHT = float(os.getenv("INVESTMENT_SEMANTIC_WEIGHT", "0.5"))
+# Candidates fetched from Qdrant and reranked per investment-mode search.
+INVESTMENT_CANDIDATES = int(os.getenv("INVESTMENT_CANDIDATES", "200"))
+
+
+def candidate_limit(top_k: int, candidates: int = None) -> int:
+    return max(top_k, candidates or INVESTMENT_CANDIDATES)
+
+
+def ranking_payload(with_payload, weights: dict = None):
+    """
+    `with_payload` for candidate fetches: a field list gains the weighted
+    fields so they can be scored; other selectors are left as they are.
+    """
+    if isinstance(with_payload, list):
+        return list(dict.fromkeys(with_payload + list(weights or INVESTMENT_WEIGHTS)))
+    return with_payload
+
+
+def _number(value) -> float:
+    # Same rules as the fast path's float64 conversion, but per value: numeric
+    # strings parse, anything unparseable is missing.
+    try:
+        return np.nan if value is None else float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def _minmax(x: np.ndarray) -> np.ndarray:
+    lo, hi = x.min(), x.max()
+    return (x - lo) / (hi - lo) if hi > lo else np.zeros_like(x)
+
+
+def blend_scores(semantic, payloads: list[dict], weights: dict = None,
+                 semantic_weight: float = None) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Final and investment scores for N candidates. The investment score is
+    one (N, F) @ (F,) product over the weighted payload fields. A missing or
+    unparseable value takes the field's mean over the candidates, so it is
+    neither rewarded nor penalised; a field no candidate has adds nothing.
+    Both scores are min-max scaled over the candidates before blending,
+    since cosine and ROI live on different scales.
+    """
+    weights = INVESTMENT_WEIGHTS if weights is None else weights
+    semantic_weight = SEMANTIC_WEIGHT if semantic_weight is None else semantic_weight
+    fields = list(weights)
+    # A flat list converts to an array far faster than a list of rows; None becomes NaN.
+    try:
+        flat = np.array([p.get(f) for p in payloads for f in fields], dtype=np.float64)
+    except (TypeError, ValueError):  # something unparseable; convert one by one
+        flat = np.array([_number(p.get(f)) for p in payloads for f in fields], dtype=np.float64)
+    features = flat.reshape(len(payloads), len(fields))
+    missing = ~np.isfinite(features)
+    present = (~missing).sum(axis=0)
+    means = np.where(missing, 0.0, features).sum(axis=0) / np.maximum(present, 1)
+    features = np.where(missing, means, features)
+    investment = features @ np.array([weights[f] for f in fields], dtype=np.float64)
+    semantic = np.asarray(semantic, dtype=np.float64)
+    final = semantic_weight * _minmax(semantic) + (1 - semantic_weight) * _minmax(investment)
+    return final, investment
+
+
+def top_indices(scores: np.ndarray, top_k: int) -> np.ndarray:
+    """
+    Indices of the top_k scores, best first (ties keep candidate order).
+    """
+    if top_k < len(scores):
+        part = np.argpartition(-scores, top_k - 1)[:top_k]
+        return part[np.lexsort((part, -scores[part]))]
+    return np.argsort(-scores, kind="stable")
+
+
+def rerank(points, top_k: int, weights: dict = None, semantic_weight: float = None) -> list[tuple]:
+    """
+    Rerank Qdrant hits (anything with .score and .payload) by the blended
+    score; returns (point, final score, investment score) for the top_k.
+    """
+    points = list(points)
+    if not points:
+        return []
+    payloads = [p.payload or {} for p in points]
+    final, investment = blend_scores([p.score for p in points], payloads, weights, semantic_weight)
+    return [(points[i], float(final[i]), float(investment[i])) for i in top_indices(final, top_k)]
+
+
+def synthetic_points(n: int, seed: int = 0) -> list:
+    """
+    N fake search hits (score + investment payload) for benchmarks and tests.
+    """
+    from types import SimpleNamespace
+
+    rng = np.random.default_rng(seed)
+    return [
+        SimpleNamespace(score=float(s), payload={
+            "name": f"Product {i}", "price": float(rng.uniform(50, 400)),
+            "roi": float(r), "liquidity": float(l), "volatility": float(v),
+        })
+        for i, (s, r, l, v) in enumerate(zip(
+            rng.uniform(0.2, 0.9, n), rng.normal(0.05, 0.2, n), rng.uniform(0, 1, n), rng.uniform(0, 1, n),
+        ))
+    ]
+
+
+def bench(n: int = 1000, top_k: int = 10, repeat: int = 200, budget_ms: float = 5.0) -> bool:
+    """
+    Rerank latency for N synthetic candidates against a per-query budget,
+    next to a per-candidate Python loop computing the same ranking.
+    """
+    points = synthetic_points(n)
+    weights, alpha = INVESTMENT_WEIGHTS, SEMANTIC_WEIGHT
+
+    def loop(points):
+        inv = [sum(w * float(p.payload.get(f) or 0.0) for f, w in weights.items()) for p in points]
+        sem = [p.score for p in points]
+        def scale(xs):
+            lo, hi = min(xs), max(xs)
+            return [(x - lo) / (hi - lo) if hi > lo else 0.0 for x in xs]
+
+        final = [alpha * s + (1 - alpha) * i for s, i in zip(scale(sem), scale(inv))]
+        return sorted(range(len(points)), key=lambda i: -final[i])[:top_k]
+
+    assert [points.index(p) for p, _, _ in rerank(points, top_k)] == loop(points), "rerank differs from loop"
+
+    results = {}
+    for name, fn in (("numpy", lambda: rerank(points, top_k)), ("loop", lambda: loop(points))):
+        latencies = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            fn()
+            latencies.append(time.perf_counter() - started)
+        lat = np.array(latencies) * 1000
+        results[name] = (np.percentile(lat, 50), np.percentile(lat, 95))
+        print(f"[BENCH] {name:<5} N={n} top_k={top_k}  p50={results[name][0]:6.2f} ms  p95={results[name][1]:6.2f} ms")
+    within = results["numpy"][1] <= budget_ms
+    print(f"[BENCH] p95 {results['numpy'][1]:.2f} ms {'within' if within else 'OVER'} the {budget_ms} ms budget")
+    return within
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--n", type=int, default=1000, help="Candidates to rerank")
+    parser.add_argument("--top_k", type=int, default=10, help="Results kept after reranking")
+    parser.add_argument("--repeat", type=int, default=200, help="Timed reranks")
+    parser.add_argument("--budget_ms", type=float, default=5.0, help="p95 latency budget per rerank")
+    args = parser.parse_args()
+    sys.exit(0 if bench(args.n, args.top_k, args.repeat, args.budget_ms) else 1)
@@ -0,0 +1,224 @@
+import argparse
+import json
+import multiprocessing as mp
+import os
+import time
+from collections import deque
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+from qdrant_utils import bump_data_version, get_client, set_payloads
+
+RESALE_MODEL_PATH = os.getenv("RESALE_MODEL_PATH", "models/resale_xgb.json")
+# Release date and colorway aren't stored in payloads; they are joined in by name.
+PRODUCT_DATA_PATH = os.getenv("RESALE_PRODUCT_DATA", "data/nike_shoes.csv")
+# Products per prediction call (one worker task).
+SCORE_BATCH_SIZE = int(os.getenv("RESALE_BATCH_SIZE", "8192"))
+SCORE_WORKERS = int(os.getenv("RESALE_WORKERS", str(os.cpu_count() or 1)))
+
+FEATURES = ["price", "age_days", "release_month", "category", "colorway", "colorway_tones"]
+# Payload fields the job reads; release_date/colorway win over the CSV when present.
+SOURCE_FIELDS = ["name", "price", "category", "release_date", "colorway"]
+
+
+def _meta_path(model_path: str) -> str:
+    return os.path.splitext(model_path)[0] + ".meta.json"
+
+
+def load_product_attributes(path: str = PRODUCT_DATA_PATH) -> pd.DataFrame:
+    """
+    release_date and colorway per lower-cased product name.
+    """
+    if not path or not os.path.exists(path):
+        return pd.DataFrame(columns=["release_date", "colorway"], index=pd.Index([], name="key"))
+    df = pd.read_csv(path, usecols=["name", "release_date", "colorway"])
+    df["key"] = df["name"].astype(str).str.strip().str.lower()
+    return df.drop_duplicates("key").set_index("key")[["release_date", "colorway"]]
+
+
+def _primary_colour(colorway: pd.Series) -> pd.Series:
+    return colorway.astype("string").str.split("/").str[0].str.strip().str.lower()
+
+
+def _codes(values: pd.Series, vocab: list[str]) -> np.ndarray:
+    # Unseen or missing values become NaN, which XGBoost treats as missing.
+    codes = pd.Categorical(values, categories=vocab).codes.astype(np.float32)
+    codes[codes < 0] = np.nan
+    return codes
+
+
+def _product_frame(payloads: list[dict], attributes: pd.DataFrame) -> pd.DataFrame:
+    df = pd.DataFrame.from_records(payloads, columns=SOURCE_FIELDS)
+    joined = attributes.reindex(df["name"].astype(str).str.strip().str.lower())
+    df["release_date"] = pd.to_datetime(df["release_date"].fillna(pd.Series(joined["release_date"].values)),
+                                        errors="coerce")
+    df["colorway"] = df["colorway"].fillna(pd.Series(joined["colorway"].values)).astype("string")
+    return df
+
+
+def build_features(payloads: list[dict], attributes: pd.DataFrame, vocab: dict, as_of: date = None) -> np.ndarray:
+    """
+    (n, len(FEATURES)) float32 matrix for a batch of payloads, built column
+    by column: one join against `attributes`, then vectorized date and
+    category encodings.
+    """
+    df = _product_frame(payloads, attributes)
+    as_of = pd.Timestamp(as_of or date.today())
+    features = np.empty((len(df), len(FEATURES)), dtype=np.float32)
+    features[:, 0] = pd.to_numeric(df["price"], errors="coerce").to_numpy(np.float32, na_value=np.nan)
+    features[:, 1] = (as_of - df["release_date"]).dt.days.to_numpy(np.float32, na_value=np.nan)
+    features[:, 2] = df["release_date"].dt.month.to_numpy(np.float32, na_value=np.nan)
+    features[:, 3] = _codes(df["category"].astype("string").str.lower(), vocab["category"])
+    features[:, 4] = _codes(_primary_colour(df["colorway"]), vocab["colorway"])
+    features[:, 5] = (df["colorway"].str.count("/") + 1).to_numpy(np.float32, na_value=np.nan)
+    return features
+
+
+def train_model(data_path: str, model_path: str = RESALE_MODEL_PATH, target: str = "resale_price",
+                attributes_path: str = PRODUCT_DATA_PATH):
+    """
+    Fit an XGBoost regressor on a labelled CSV (name, price, category,
+    optional release_date/colorway, and `target`) and save it with the
+    category vocabularies it was trained on.
+    """
+    import xgboost as xgb
+
+    df = pd.read_csv(data_path).dropna(subset=[target])
+    attributes = load_product_attributes(attributes_path)
+    payloads = df.reindex(columns=SOURCE_FIELDS).to_dict("records")
+    products = _product_frame(payloads, attributes)
+    vocab = {
+        "category": sorted(products["category"].dropna().astype(str).str.lower().unique().tolist()),
+        "colorway": sorted(_primary_colour(products["colorway"]).dropna().unique().tolist()),
+    }
+
+    model = xgb.XGBRegressor(n_estimators=300, max_depth=6, learning_rate=0.1, subsample=0.9, tree_method="hist")
+    model.fit(build_features(payloads, attributes, vocab), df[target].to_numpy(np.float32))
+
+    os.makedirs(os.path.dirname(model_path) or ".", exist_ok=True)
+    model.save_model(model_path)
+    with open(_meta_path(model_path), "w") as f:
+        json.dump({"features": FEATURES, "vocab": vocab, "target": target}, f, indent=2)
+    print(f"[INFO] Trained on {len(df)} rows -> {model_path}")
+
+
+def model_available(model_path: str = RESALE_MODEL_PATH) -> bool:
+    return os.path.exists(model_path) and os.path.exists(_meta_path(model_path))
+
+
+def load_meta(model_path: str = RESALE_MODEL_PATH) -> dict:
+    with open(_meta_path(model_path)) as f:
+        meta = json.load(f)
+    if meta.get("features") != FEATURES:
+        raise ValueError(f"{model_path} was trained on features {meta.get('features')}, expected {FEATURES}")
+    return meta
+
+
+# Per-worker model, loaded once by _init_worker in each child process.
+_worker_booster = None
+
+
+def _init_worker(model_path: str, threads: int):
+    global _worker_booster
+    import xgboost as xgb
+
+    _worker_booster = xgb.Booster(params={"nthread": threads}, model_file=model_path)
+
+
+def _predict(features: np.ndarray) -> np.ndarray:
+    return np.asarray(_worker_booster.inplace_predict(features), dtype=np.float32)
+
+
+def score_collection(client, collection: str, model_path: str = RESALE_MODEL_PATH, workers: int = SCORE_WORKERS,
+                     batch_size: int = SCORE_BATCH_SIZE, write_batch: int = 256, as_of: date = None) -> dict:
+    """
+    Scroll `collection`, predict resale value for every product in
+    `batch_size` chunks on a pool of `workers` processes, and write
+    predicted_resale and roi back with batched set_payload. Qdrant calls
+    stay on this thread; up to 2 * workers batches are predicted at once.
+
+    Upserts replace whole payloads and blue/green builds start empty, so
+    main.py re-runs this after every sync or rebuild of a dataset with
+    "score_resale" set (before the alias swap for blue/green).
+    """
+    meta = load_meta(model_path)
+    attributes = load_product_attributes()
+    workers = max(1, workers)
+    threads = max(1, (os.cpu_count() or 1) // workers)
+    timings = {"scroll": 0.0, "features": 0.0, "wait": 0.0, "write": 0.0}
+    scored = 0
+
+    def write(pending):
+        nonlocal scored
+        ids, prices, result = pending
+        started = time.perf_counter()
+        predicted = result.get()
+        timings["wait"] += time.perf_counter() - started
+
+        started = time.perf_counter()
+        roi = np.where(prices > 0, (predicted - prices) / np.where(prices > 0, prices, 1), np.nan)
+        payloads = [
+            {"predicted_resale": round(float(p), 2), "roi": None if np.isnan(r) else round(float(r), 4)}
+            for p, r in zip(predicted.tolist(), roi.tolist())
+        ]
+        set_payloads(client, collection, ids, payloads, batch_size=write_batch)
+        timings["write"] += time.perf_counter() - started
+        scored += len(ids)
+
+    started_all = time.perf_counter()
+    # spawn, as in encode_pool: forking after xgboost/OpenMP initialised can deadlock.
+    with mp.get_context("spawn").Pool(workers, initializer=_init_worker, initargs=(model_path, threads)) as pool:
+        in_flight = deque()
+        offset = None
+        while True:
+            started = time.perf_counter()
+            points, offset = client.scroll(
+                collection_name=collection, limit=batch_size, offset=offset,
+                with_payload=SOURCE_FIELDS, with_vectors=False,
+            )
+            timings["scroll"] += time.perf_counter() - started
+            if points:
+                started = time.perf_counter()
+                payloads = [p.payload or {} for p in points]
+                features = build_features(payloads, attributes, meta["vocab"], as_of)
+                timings["features"] += time.perf_counter() - started
+                # roi uses the stored price at full precision, not the float32 feature column.
+                prices = pd.to_numeric(pd.Series([p.get("price") for p in payloads], dtype=object),
+                                       errors="coerce").to_numpy(np.float64)
+                in_flight.append(([p.id for p in points], prices, pool.apply_async(_predict, (features,))))
+            while in_flight and (len(in_flight) >= 2 * workers or offset is None):
+                write(in_flight.popleft())
+            if offset is None:
+                break
+
+    elapsed = time.perf_counter() - started_all
+    if scored:
+        bump_data_version(client, collection)  # cached search results carry the old roi
+    stats = {
+        "products": scored,
+        "seconds": round(elapsed, 2),
+        "products_per_s": round(scored / elapsed, 1) if elapsed else 0.0,
+        **{f"{k}_s": round(v, 2) for k, v in timings.items()},
+    }
+    print(f"[INFO] Scored {scored} products in '{collection}' in {elapsed:.1f}s "
+          f"({stats['products_per_s']:,.0f} products/s; scroll {stats['scroll_s']}s, features {stats['features_s']}s, "
+          f"waiting on predictions {stats['wait_s']}s, writes {stats['write_s']}s)")
+    return stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--collection", type=str, default="nike_shoes", help="Collection (or alias) to score")
+    parser.add_argument("--model", type=str, default=RESALE_MODEL_PATH, help="Saved XGBoost model")
+    parser.add_argument("--workers", type=int, default=SCORE_WORKERS, help="Prediction processes")
+    parser.add_argument("--batch_size", type=int, default=SCORE_BATCH_SIZE, help="Products per prediction batch")
+    parser.add_argument("--write_batch", type=int, default=256, help="Points per batched set_payload request")
+    parser.add_argument("--train", type=str, help="Labelled CSV to train and save the model from instead of scoring")
+    parser.add_argument("--target", type=str, default="resale_price", help="Label column for --train")
+    args = parser.parse_args()
+    if args.train:
+        train_model(args.train, args.model, args.target)
+    else:
+        score_collection(get_client(), args.collection, args.model, args.workers, args.batch_size, args.write_batch)
@@ -0,0 +1,181 @@
+import asyncio
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+
+from query_cache import normalize_query
+
+DEFAULT_MAXSIZE = int(os.getenv("RESULT_CACHE_SIZE", "4096"))
+DEFAULT_TTL = float(os.getenv("RESULT_CACHE_TTL", "300"))
+# How long past its TTL an entry may still be served while it is refreshed.
+DEFAULT_STALE_TTL = float(os.getenv("RESULT_CACHE_STALE_TTL", "60"))
+# How often the collection data version is re-read from Qdrant.
+DEFAULT_VERSION_INTERVAL = float(os.getenv("RESULT_CACHE_VERSION_INTERVAL", "2"))
+
+
+def result_key(query: str, collection: str, top_k: int, filters=None, extra=None) -> tuple:
+    return (normalize_query(query), collection, repr(filters), top_k, extra)
+
+
+class SearchResultCache:
+    """
+    Cache of fully post-processed search responses.
+
+    Each entry remembers the data version of its collection; when the
+    version changes (reindex, alias swap, payload update) the entry stops
+    matching. Entries past their TTL but within `stale_ttl` are served
+    immediately while a background refresh runs (stale-while-revalidate).
+    Collection versions are polled at most every `version_interval` seconds,
+    also in the background, so a hit never waits on Qdrant.
+    """
+
+    def __init__(self, version_fn: Callable[[str], str], maxsize: int = DEFAULT_MAXSIZE, ttl: float = DEFAULT_TTL,
+                 stale_ttl: float = DEFAULT_STALE_TTL, version_interval: float = DEFAULT_VERSION_INTERVAL):
+        self.version_fn = version_fn
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.version_interval = version_interval
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self._entries: OrderedDict = OrderedDict()
+        self._versions: dict = {}
+        self._inflight: set = set()
+        self._tasks: set = set()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="result-cache")
+
+    # -- collection versions ------------------------------------------------
+    def _refresh_version(self, collection: str):
+        try:
+            version = self.version_fn(collection)
+        except Exception:
+            version = None
+        with self._lock:
+            self._versions[collection] = (version, time.monotonic())
+            self._inflight.discard(("version", collection))
+
+    def version(self, collection: str):
+        with self._lock:
+            known = self._versions.get(collection)
+            if known is not None and time.monotonic() - known[1] >= self.version_interval:
+                self._schedule(("version", collection), self._refresh_version, collection)
+        if known is None:
+            self._refresh_version(collection)
+            known = self._versions[collection]
+        return known[0]
+
+    def invalidate(self, collection: str = None):
+        with self._lock:
+            if collection is None:
+                self._entries.clear()
+                self._versions.clear()
+            else:
+                self._versions.pop(collection, None)
+                for key in [k for k in self._entries if k[1] == collection]:
+                    del self._entries[key]
+
+    # -- entries -----------------------------------------------------------
+    def _schedule(self, token, fn, *args):
+        # Caller holds the lock.
+        if token not in self._inflight:
+            self._inflight.add(token)
+            self._executor.submit(fn, *args)
+
+    def _store(self, key: tuple, value, version):
+        with self._lock:
+            self._entries[key] = (value, version, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def _revalidate(self, key: tuple, compute: Callable, version):
+        try:
+            self._store(key, compute(), version)
+        except Exception:
+            pass
+        finally:
+            with self._lock:
+                self._inflight.discard(key)
+
+    def _lookup(self, key: tuple, version):
+        """
+        Returns (found, value, stale). Caller must hold the lock.
+        """
+        entry = self._entries.get(key)
+        if entry is not None and version is not None and entry[1] == version:
+            age = time.monotonic() - entry[2]
+            if age <= self.ttl:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return True, entry[0], False
+            if age <= self.ttl + self.stale_ttl:
+                self.stale_hits += 1
+                return True, entry[0], True
+        self.misses += 1
+        return False, None, False
+
+    def get_or_compute(self, key: tuple, compute: Callable):
+        """
+        `key` comes from result_key(); its second element is the collection.
+        """
+        version = self.version(key[1])
+        with self._lock:
+            found, value, stale = self._lookup(key, version)
+            if stale:
+                self._schedule(key, self._revalidate, key, compute, version)
+        if found:
+            return value
+
+        value = compute()
+        if version is not None:
+            self._store(key, value, version)
+        return value
+
+    async def aget_or_compute(self, key: tuple, compute):
+        """
+        Async variant of get_or_compute; `compute` is a coroutine function.
+        Version lookups run off the event loop.
+        """
+        with self._lock:
+            known = key[1] in self._versions
+        version = self.version(key[1]) if known else await asyncio.to_thread(self.version, key[1])
+        with self._lock:
+            found, value, stale = self._lookup(key, version)
+            if stale and key not in self._inflight:
+                self._inflight.add(key)
+                task = asyncio.get_running_loop().create_task(self._arevalidate(key, compute, version))
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+        if found:
+            return value
+
+        value = await compute()
+        if version is not None:
+            self._store(key, value, version)
+        return value
+
+    async def _arevalidate(self, key: tuple, compute, version):
+        try:
+            self._store(key, await compute(), version)
+        except Exception:
+            pass
+        finally:
+            with self._lock:
+                self._inflight.discard(key)
+
+    def stats(self) -> dict:
+        total = self.hits + self.stale_hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "hit_ratio": round((self.hits + self.stale_hits) / total, 4) if total else 0.0,
+            "versions": {c: v for c, (v, _) in self._versions.items()},
+        }
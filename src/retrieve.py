@@ -1,52 +1,53 @@
-import os
-from dotenv import load_dotenv
-from qdrant_client import QdrantClient
-from qdrant_client.models import Filter, FieldCondition, MatchValue
-from vectorize import get_embedding
+from qdrant_utils import call_with_reconnect, get_search_params
+from vectorize import get_query_embedding
+from search_filters import build_filter, filter_spec
+from ranking import candidate_limit, parse_weights, rerank
 import argparse
 
-# Load environment variables
-load_dotenv()
+def search_products(query: str, collection: str, top_k: int = 5, category: str = None, filters=None,
+                    investment_mode: bool = False, weights=None, candidates: int = None):
+    """
+    `filters` is a filter expression (e.g. "price<=200, roi>0.1") or spec
+    dict, see search_filters; `category` is kept as a shorthand.
 
-def get_client():
-    qdrant_host = os.getenv("QDRANT_HOST", "https://dfd0b68f-16b0-481c-93f7-0efd4d2b121b.us-east4-0.gcp.cloud.qdrant.io")
-    qdrant_api_key = os.getenv("QDRANT_API_KEY")
-    if not qdrant_api_key:
-        raise RuntimeError("Missing QDRANT_API_KEY. Set it in your environment or a local .env file.")
-    return QdrantClient(url=qdrant_host, api_key=qdrant_api_key, https=True)
+    With `investment_mode`, `candidates` hits are fetched and reranked by
+    semantic score blended with the weighted roi/liquidity/volatility score
+    (see ranking.py; `weights` overrides INVESTMENT_WEIGHTS).
+    """
+    vector = get_query_embedding(query)
+    query_filter = build_filter(filter_spec(filters, category=category))
+    weights = parse_weights(weights) if weights else None
+    limit = candidate_limit(top_k, candidates) if investment_mode else top_k
 
-# Connect to Qdrant
-client = get_client()
+    def run(client):
+        params = get_search_params(client, collection)
+        try:
+            # Try newer API
+            return client.search(
+                collection_name=collection,
+                query_vector=vector,
+                limit=limit,
+                query_filter=query_filter,
+                search_params=params,
+            )
+        except AttributeError:
+            # Fallback to older API
+            return client.query_points(
+                collection_name=collection,
+                query=vector,
+                limit=limit,
+                query_filter=query_filter,
+                search_params=params,
+            ).points
 
-def search_products(query: str, collection: str, top_k: int = 5, category: str = None):
-    from qdrant_client.models import PointStruct
-    vector = get_embedding(query)
+    # Connects lazily (importing this module doesn't touch the network) and
+    # reconnects once if the connection has dropped.
+    results = call_with_reconnect(run)
 
-    # Optional filter by category
-    query_filter = None
-    if category:
-        query_filter = Filter(
-            must=[
-                FieldCondition(key="category", match=MatchValue(value=category))
-            ]
-        )
-
-    try:
-        # Try newer API
-        results = client.search(
-            collection_name=collection,
-            query_vector=vector,
-            limit=top_k,
-            query_filter=query_filter
-        )
-    except AttributeError:
-        # Fallback to older API
-        results = client.query_points(
-            collection_name=collection,
-            query=vector,
-            limit=top_k,
-            query_filter=query_filter
-        ).points
+    if investment_mode:
+        ranked = rerank(results, top_k, weights)
+        results = [hit for hit, _, _ in ranked]
+        print(f"\n📈 Investment ranking over {limit} candidates")
 
     print(f"\n🔎 Top {top_k} results for: '{query}' in '{collection}'\n")
     for i, hit in enumerate(results, 1):
@@ -56,6 +57,9 @@ def search_products(query: str, collection: str, top_k: int = 5, category: str =
         category_val = payload.get('category', 'N/A')
         description = payload.get('description', payload.get('subtitle', 'N/A'))
         print(f"{i}. {name} — ${price:.2f} [{category_val}]")
+        if investment_mode:
+            print(f"   roi={payload.get('roi')} liquidity={payload.get('liquidity')} "
+                  f"volatility={payload.get('volatility')} score={ranked[i - 1][1]:.3f}")
         print(f"   {description}\n")
 
 if __name__ == "__main__":
@@ -64,6 +68,11 @@ if __name__ == "__main__":
     parser.add_argument("--collection", type=str, required=True, help="Qdrant collection name")
     parser.add_argument("--top_k", type=int, default=5, help="Number of results to return")
     parser.add_argument("--category", type=str, help="Optional category filter")
+    parser.add_argument("--filter", type=str, help='Filter expression, e.g. "category=shoes|boots, price<=200, roi>0.1"')
+    parser.add_argument("--investment_mode", action="store_true", help="Rerank by semantic + investment score")
+    parser.add_argument("--weights", type=str, help='Investment weights, e.g. "roi=0.6,liquidity=0.3,volatility=-0.1"')
+    parser.add_argument("--candidates", type=int, help="Candidates to rerank in investment mode")
 
     args = parser.parse_args()
-    search_products(args.query, args.collection, args.top_k, args.category)
+    search_products(args.query, args.collection, args.top_k, args.category, filters=args.filter,
+                    investment_mode=args.investment_mode, weights=args.weights, candidates=args.candidates)
@@ -0,0 +1,175 @@
+import argparse
+import re
+import time
+
+from qdrant_client.models import FieldCondition, Filter, MatchAny, MatchExcept, PayloadSchemaType, Range
+
+# Payload fields that can be filtered on, with the index created for each.
+FILTER_FIELDS = {
+    "category": PayloadSchemaType.KEYWORD,
+    "price": PayloadSchemaType.FLOAT,
+    "roi": PayloadSchemaType.FLOAT,
+    "liquidity": PayloadSchemaType.FLOAT,
+    "volatility": PayloadSchemaType.FLOAT,
+    "predicted_resale": PayloadSchemaType.FLOAT,
+}
+
+_CLAUSE = re.compile(r"^\s*(\w+)\s*(<=|>=|!=|=|<|>)\s*(.+?)\s*$")
+_RANGE_OPS = {"<": "lt", "<=": "lte", ">": "gt", ">=": "gte"}
+
+
+class FilterError(ValueError):
+    pass
+
+
+def parse_filter(expr: str) -> dict:
+    """
+    Parse a filter expression into a filter spec.
+
+        "category=shoes|boots, price<=200, roi>0.1"
+        -> {"category": {"any": ["shoes", "boots"]}, "price": {"lte": 200.0}, "roi": {"gt": 0.1}}
+
+    Keyword fields take = or != with |-separated values; numeric fields
+    take =, <, <=, > and >=. Clauses are ANDed.
+    """
+    spec: dict = {}
+    for clause in filter(None, (c.strip() for c in (expr or "").split(","))):
+        m = _CLAUSE.match(clause)
+        if m is None:
+            raise FilterError(f"Cannot parse filter clause '{clause}'")
+        field, op, value = m.groups()
+        if field not in FILTER_FIELDS:
+            raise FilterError(f"Unknown filter field '{field}' (expected one of {', '.join(FILTER_FIELDS)})")
+        cond = spec.setdefault(field, {})
+        if FILTER_FIELDS[field] == PayloadSchemaType.KEYWORD:
+            if op not in ("=", "!="):
+                raise FilterError(f"'{field}' only supports = and !=")
+            cond.setdefault("any" if op == "=" else "except", []).extend(v.strip() for v in value.split("|"))
+            continue
+        try:
+            number = float(value)
+        except ValueError:
+            raise FilterError(f"'{field}' needs a number, got '{value}'") from None
+        if op == "=":
+            cond.update(gte=number, lte=number)
+        elif op == "!=":
+            raise FilterError(f"'{field}' does not support !=")
+        else:
+            cond[_RANGE_OPS[op]] = number
+    return spec
+
+
+def normalize_spec(spec) -> dict:
+    """
+    Accept an expression string or a spec dict (as built by the Streamlit
+    sidebar) and return a validated spec; shorthand values are expanded:
+    {"category": "shoes"} -> {"category": {"any": ["shoes"]}}.
+    """
+    if spec is None:
+        return {}
+    if isinstance(spec, str):
+        return parse_filter(spec)
+    out = {}
+    for field, cond in spec.items():
+        if field not in FILTER_FIELDS:
+            raise FilterError(f"Unknown filter field '{field}' (expected one of {', '.join(FILTER_FIELDS)})")
+        if cond is None or cond == [] or cond == {}:
+            continue
+        if FILTER_FIELDS[field] == PayloadSchemaType.KEYWORD:
+            if isinstance(cond, (str, list, tuple)):
+                cond = {"any": [cond] if isinstance(cond, str) else list(cond)}
+        elif not isinstance(cond, dict):
+            cond = {"gte": float(cond), "lte": float(cond)}
+        out[field] = cond
+    return out
+
+
+def filter_spec(expr=None, **fields) -> dict:
+    """
+    Merge an expression (or spec) with per-field values such as
+    category="shoes" or price={"lte": 200}; fields set to None are skipped
+    and override the expression otherwise.
+    """
+    spec = normalize_spec(expr)
+    spec.update(normalize_spec(fields))
+    return spec
+
+
+def build_filter(spec) -> Filter | None:
+    """
+    Qdrant Filter for an expression string or spec dict; None when empty.
+    """
+    must = []
+    for field, cond in normalize_spec(spec).items():
+        if FILTER_FIELDS[field] == PayloadSchemaType.KEYWORD:
+            if cond.get("any"):
+                must.append(FieldCondition(key=field, match=MatchAny(any=cond["any"])))
+            if cond.get("except"):
+                must.append(FieldCondition(key=field, match=MatchExcept(**{"except": cond["except"]})))
+        else:
+            bounds = {k: float(v) for k, v in cond.items() if k in ("gt", "gte", "lt", "lte")}
+            if bounds:
+                must.append(FieldCondition(key=field, range=Range(**bounds)))
+    return Filter(must=must) if must else None
+
+
+def filter_key(spec) -> str:
+    """
+    Canonical string for a spec, for cache keys.
+    """
+    spec = normalize_spec(spec)
+    return ";".join(f"{field}:{sorted(cond.items())!r}" for field, cond in sorted(spec.items()))
+
+
+def bench(n: int = 50_000, queries: int = 200, local: bool = False):
+    """
+    Filtered query latency on the same synthetic data with and without payload indexes.
+    """
+    import numpy as np
+    from qdrant_client import QdrantClient
+    from qdrant_client.models import Batch, Distance, VectorParams
+    from qdrant_utils import ensure_payload_indexes, get_client
+
+    client = QdrantClient(location=":memory:") if local else get_client()
+    rng = np.random.default_rng(0)
+    dim = 384
+    categories = [f"cat{i}" for i in range(50)]
+    vectors = rng.standard_normal((n, dim), dtype=np.float32)
+    payloads = [
+        {"category": categories[i % len(categories)], "price": float(p), "roi": float(r)}
+        for i, (p, r) in enumerate(zip(rng.uniform(10, 1000, n), rng.normal(0.05, 0.2, n)))
+    ]
+    probes = rng.standard_normal((queries, dim), dtype=np.float32).tolist()
+    expr = "category=cat3|cat7, price<=300, roi>0.2"
+    query_filter = build_filter(expr)
+
+    for indexed in (False, True):
+        name = f"bench_filters_{'indexed' if indexed else 'plain'}"
+        if client.collection_exists(collection_name=name):
+            client.delete_collection(collection_name=name)
+        client.create_collection(name, vectors_config=VectorParams(size=dim, distance=Distance.COSINE))
+        if indexed:
+            ensure_payload_indexes(client, name)
+        try:
+            for i in range(0, n, 1000):
+                client.upsert(name, points=Batch(ids=list(range(i, min(i + 1000, n))),
+                                                 vectors=vectors[i:i + 1000].tolist(), payloads=payloads[i:i + 1000]))
+            latencies = []
+            for probe in probes:
+                started = time.perf_counter()
+                client.query_points(name, query=probe, query_filter=query_filter, limit=10)
+                latencies.append(time.perf_counter() - started)
+            lat = np.array(latencies) * 1000
+            print(f"[BENCH] {'indexed' if indexed else 'no index':<9} filter='{expr}' "
+                  f"p50={np.percentile(lat, 50):7.2f} ms  p95={np.percentile(lat, 95):7.2f} ms")
+        finally:
+            client.delete_collection(collection_name=name)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--n", type=int, default=50_000, help="Synthetic points per collection")
+    parser.add_argument("--queries", type=int, default=200, help="Filtered queries per run")
+    parser.add_argument("--local", action="store_true", help="Use an in-memory client (no payload index support)")
+    args = parser.parse_args()
+    bench(args.n, args.queries, args.local)
@@ -0,0 +1,130 @@
+import hashlib
+import json
+import os
+from typing import Callable, Iterable
+
+import pandas as pd
+
+from qdrant_utils import point_id
+
+SNAPSHOT_DIR = os.getenv("SYNC_SNAPSHOT_DIR", ".cache/sync")
+KEY_FIELDS = ("name",)
+# Column on frames yielded by DeltaPlanner carrying the payloads it already built.
+PAYLOAD_COLUMN = "_payload"
+
+
+def product_keys(df: pd.DataFrame, key_fields=KEY_FIELDS) -> list[str]:
+    """
+    Stable product key built from `key_fields`, e.g. "nike air max 90 essentials".
+    """
+    parts = [df[f].astype(str).str.strip().str.lower() for f in key_fields]
+    keys = parts[0]
+    for p in parts[1:]:
+        keys = keys + "|" + p
+    return keys.tolist()
+
+
+def point_ids(df: pd.DataFrame, key_fields=KEY_FIELDS) -> list[str]:
+    return [point_id(k) for k in product_keys(df, key_fields)]
+
+
+def _digest(value: str) -> str:
+    return hashlib.sha1(value.encode("utf-8")).hexdigest()[:16]
+
+
+def text_hash(text: str, model_name: str) -> str:
+    # Model name is part of the hash so switching models re-embeds everything.
+    return _digest(f"{model_name}\0{' '.join(text.split())}")
+
+
+def payload_hash(payload: dict) -> str:
+    return _digest(json.dumps(payload, sort_keys=True, default=str))
+
+
+def snapshot_path(collection: str) -> str:
+    return os.path.join(SNAPSHOT_DIR, f"{collection}.json")
+
+
+def load_snapshot(collection: str) -> dict:
+    """
+    Last synced state of a collection: {point_id: [text_hash, payload_hash]}.
+    """
+    path = snapshot_path(collection)
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_snapshot(collection: str, snapshot: dict):
+    os.makedirs(SNAPSHOT_DIR, exist_ok=True)
+    path = snapshot_path(collection)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(snapshot, f)
+    os.replace(tmp, path)
+
+
+class DeltaPlanner:
+    """
+    Diffs a stream of source rows against the previous snapshot.
+
+    `changed_rows` yields only rows that need (re-)embedding: new products and
+    products whose name/description changed. Rows whose payload alone changed
+    are handed to `on_payload_update` in batches, and whatever is left in the
+    old snapshot once the stream ends is reported by `deleted_ids`.
+    Yielded frames carry their payloads in PAYLOAD_COLUMN; pass `payloads`
+    as the ingest payload_fn to reuse them instead of building them again.
+    """
+
+    def __init__(self, previous: dict, model_name: str, payload_fn: Callable[[pd.DataFrame], list[dict]],
+                 key_fields=KEY_FIELDS):
+        self.previous = previous
+        self.model_name = model_name
+        self.payload_fn = payload_fn
+        self.key_fields = key_fields
+        self.current = {}
+        self.counts = {"inserted": 0, "reembedded": 0, "payload_updated": 0, "unchanged": 0, "deleted": 0}
+
+    def changed_rows(self, frames: Iterable[pd.DataFrame], on_payload_update: Callable[[list, list], None] = None):
+        for df in frames:
+            ids = point_ids(df, self.key_fields)
+            texts = (df["name"].astype(str) + " " + df["description"].astype(str)).tolist()
+            payloads = self.payload_fn(df)
+
+            embed_mask = []
+            update_ids, update_payloads = [], []
+            for pid, text, payload in zip(ids, texts, payloads):
+                fingerprint = [text_hash(text, self.model_name), payload_hash(payload)]
+                old = self.previous.get(pid)
+                self.current[pid] = fingerprint
+                if old is None:
+                    self.counts["inserted"] += 1
+                    embed_mask.append(True)
+                elif old[0] != fingerprint[0]:
+                    self.counts["reembedded"] += 1
+                    embed_mask.append(True)
+                elif old[1] != fingerprint[1]:
+                    self.counts["payload_updated"] += 1
+                    update_ids.append(pid)
+                    update_payloads.append(payload)
+                    embed_mask.append(False)
+                else:
+                    self.counts["unchanged"] += 1
+                    embed_mask.append(False)
+
+            if update_ids and on_payload_update is not None:
+                on_payload_update(update_ids, update_payloads)
+            if any(embed_mask):
+                kept = [payload for payload, keep in zip(payloads, embed_mask) if keep]
+                yield df[embed_mask].assign(**{PAYLOAD_COLUMN: kept})
+
+    def payloads(self, df: pd.DataFrame) -> list[dict]:
+        if PAYLOAD_COLUMN in df:
+            return df[PAYLOAD_COLUMN].tolist()
+        return self.payload_fn(df)
+
+    def deleted_ids(self) -> list[str]:
+        deleted = [pid for pid in self.previous if pid not in self.current]
+        self.counts["deleted"] = len(deleted)
+        return deleted
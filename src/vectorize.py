@@ -1,16 +1,236 @@
-from sentence_transformers import SentenceTransformer
+import time
 
-# Load the MiniLM model once
-model = SentenceTransformer('all-MiniLM-L6-v2')
+_IMPORT_STARTED = time.perf_counter()
+
+import argparse
+import os
+import threading
+from abc import ABC, abstractmethod
+
+import numpy as np
+from query_cache import get_query_cache
+
+MODEL_NAME = os.getenv("EMBEDDING_MODEL", 'all-MiniLM-L6-v2')
+# torch (default), onnx, or onnx-int8 (dynamically quantized ONNX)
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch")
+# Quantized ONNX file to load for onnx-int8. The hub repo for MiniLM ships
+# several (avx2, avx512, avx512_vnni, arm64); pick the one matching the CPU.
+ONNX_INT8_FILE = os.getenv("EMBEDDING_ONNX_INT8_FILE", "onnx/model_quint8_avx2.onnx")
+
+
+class EmbeddingBackend(ABC):
+    """
+    Interface every embedding backend implements.
+    """
+    name = "base"
+
+    @abstractmethod
+    def encode(self, texts, batch_size: int = 32) -> np.ndarray:
+        ...
+
+    @abstractmethod
+    def dimension(self) -> int:
+        ...
+
+
+class TorchBackend(EmbeddingBackend):
+    name = "torch"
+
+    def __init__(self, model_name: str = MODEL_NAME, **model_options):
+        from sentence_transformers import SentenceTransformer  # heavy (torch); only import when loading
+
+        self.model = SentenceTransformer(model_name, **model_options)
+
+    def encode(self, texts, batch_size: int = 32) -> np.ndarray:
+        return self.model.encode(texts, batch_size=batch_size, convert_to_numpy=True)
+
+    def dimension(self) -> int:
+        return self.model.get_sentence_embedding_dimension()
+
+
+class OnnxBackend(TorchBackend):
+    """
+    Same sentence-transformers pipeline (tokenizer, pooling, normalization)
+    running the transformer on ONNX Runtime, optionally int8-quantized.
+    Needs `optimum[onnxruntime]`.
+    """
+
+    def __init__(self, model_name: str = MODEL_NAME, quantized: bool = False):
+        self.name = "onnx-int8" if quantized else "onnx"
+        model_kwargs = {"file_name": ONNX_INT8_FILE} if quantized else None
+        super().__init__(model_name, backend="onnx", model_kwargs=model_kwargs)
+
+
+def load_backend(name: str = EMBEDDING_BACKEND, model_name: str = MODEL_NAME) -> EmbeddingBackend:
+    if name == "torch":
+        return TorchBackend(model_name)
+    if name == "onnx":
+        return OnnxBackend(model_name)
+    if name == "onnx-int8":
+        return OnnxBackend(model_name, quantized=True)
+    raise ValueError(f"Unknown EMBEDDING_BACKEND '{name}' (expected torch, onnx or onnx-int8)")
+
+
+# Identifies the vectors this process produces; caches and sync snapshots key on it
+# so switching model or backend re-embeds instead of mixing vector spaces.
+MODEL_ID = MODEL_NAME if EMBEDDING_BACKEND == "torch" else f"{MODEL_NAME}@{EMBEDDING_BACKEND}"
+
+# The model is loaded on first use (or by warm_up), not at import time.
+_model: EmbeddingBackend | None = None
+_model_lock = threading.Lock()
+_load_stats = {"state": "cold", "load_seconds": None, "loaded_at": None, "error": None}
+
+def get_model() -> EmbeddingBackend:
+    """
+    Load the MiniLM model once, on first use.
+    """
+    global _model
+    if _model is None:
+        with _model_lock:
+            if _model is None:
+                _load_stats["state"] = "loading"
+                started = time.perf_counter()
+                try:
+                    backend = load_backend()
+                    backend.encode(["warm up"])  # first call initializes kernels/threads
+                except Exception as e:
+                    _load_stats.update(state="failed", error=str(e))
+                    raise
+                _load_stats.update(
+                    state="ready", load_seconds=round(time.perf_counter() - started, 3),
+                    loaded_at=time.time(), error=None,
+                )
+                _model = backend
+    return _model
+
+def warm_up(background: bool = True):
+    """
+    Load the model now, optionally on a background thread so startup isn't blocked.
+    """
+    if not background:
+        return get_model()
+
+    def _load():
+        try:
+            get_model()
+        except Exception as e:
+            print(f"[WARN] Embedding model warm-up failed: {e}")
+
+    thread = threading.Thread(target=_load, name="embedding-warmup", daemon=True)
+    thread.start()
+    return thread
+
+def is_ready() -> bool:
+    return _model is not None
+
+def model_status() -> dict:
+    return {"backend": EMBEDDING_BACKEND, "model": MODEL_NAME, "import_seconds": IMPORT_SECONDS, **_load_stats}
 
 def get_embedding(text: str):
     """
     Generate a single embedding for a given text string.
     """
-    return model.encode(text).tolist()
+    return get_model().encode(text).tolist()
+
+def encode_texts(texts: list[str]) -> np.ndarray:
+    """
+    Embeddings for a list of texts as one contiguous (n, dim) float32 array.
+    """
+    return np.ascontiguousarray(get_model().encode(texts), dtype=np.float32)
 
 def get_embeddings(texts: list[str]):
     """
-    Generate embeddings for a list of text strings.
+    Generate embeddings for a list of text strings, as Python lists.
+    """
+    return encode_texts(texts).tolist()
+
+def get_query_embedding(text: str):
+    """
+    Embedding for a search query, served from the shared query cache when possible.
+    """
+    return get_query_cache().get_or_compute(text, get_embedding)
+
+
+def _sample_texts(limit: int = 512) -> list[str]:
+    import pandas as pd
+
+    texts = ["running shoes", "luxury timepiece", "premium basketball sneakers", "cheap white trainers"]
+    for path in ("data/nike_shoes.csv", "data/watches.csv"):
+        if os.path.exists(path):
+            df = pd.read_csv(path)
+            texts += (df["name"].astype(str) + " " + df["description"].astype(str)).tolist()
+    while len(texts) < limit:
+        texts += [f"{t} {i}" for i, t in enumerate(texts)]
+    return texts[:limit]
+
+
+def _recall_at_k(ref: np.ndarray, cand: np.ndarray, k: int = 10) -> float:
+    # Each text queries the sample itself; overlap of the two backends' top-k neighbours.
+    def top_k(vectors):
+        unit = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+        return np.argsort(-(unit @ unit.T), axis=1)[:, :k]
+
+    hits = [len(set(r) & set(c)) for r, c in zip(top_k(ref).tolist(), top_k(cand).tolist())]
+    return sum(hits) / (k * len(hits))
+
+
+def parity_metrics(candidate: str, reference: str = "torch", texts: list[str] = None) -> dict:
+    """
+    Per-text cosine similarity and recall@10 between two backends' vectors for the same texts.
     """
-    return model.encode(texts).tolist()
\ No newline at end of file
+    texts = texts or _sample_texts(256)
+    ref = load_backend(reference).encode(texts)
+    cand = load_backend(candidate).encode(texts)
+    cos = np.sum(ref * cand, axis=1) / (np.linalg.norm(ref, axis=1) * np.linalg.norm(cand, axis=1))
+    return {"min_cosine": float(cos.min()), "mean_cosine": float(cos.mean()), "recall_at_10": _recall_at_k(ref, cand)}
+
+
+def parity(candidate: str, reference: str = "torch", min_cosine: float = 0.99) -> bool:
+    metrics = parity_metrics(candidate, reference)
+    ok = metrics["min_cosine"] >= min_cosine
+    print(f"[PARITY] {candidate} vs {reference}: min={metrics['min_cosine']:.5f} mean={metrics['mean_cosine']:.5f} "
+          f"recall@10={metrics['recall_at_10']:.3f} (threshold {min_cosine}) {'OK' if ok else 'FAIL'}")
+    return ok
+
+
+def bench(backends: list[str], batch_sizes: list[int], repeats: int = 3):
+    texts = _sample_texts(max(batch_sizes))
+    for name in backends:
+        backend = load_backend(name)
+        backend.encode(texts[:8])  # warm up
+        for bs in batch_sizes:
+            batch = texts[:bs]
+            timings = []
+            for _ in range(repeats):
+                started = time.perf_counter()
+                backend.encode(batch, batch_size=bs)
+                timings.append(time.perf_counter() - started)
+            best = min(timings)
+            print(f"[BENCH] {name:<10} batch={bs:<4} latency={best * 1000:8.2f} ms  "
+                  f"throughput={bs / best:10.1f} texts/s")
+
+
+IMPORT_SECONDS = round(time.perf_counter() - _IMPORT_STARTED, 4)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--parity", type=str, help="Backend to compare against torch (onnx or onnx-int8)")
+    parser.add_argument("--min_cosine", type=float, default=0.99, help="Minimum per-text cosine for --parity")
+    parser.add_argument("--bench", type=str, help="Comma-separated backends to benchmark, e.g. torch,onnx,onnx-int8")
+    parser.add_argument("--cold_start", action="store_true", help="Report import, model load and first-query time")
+    parser.add_argument("--batch_sizes", type=str, default="1,8,32,128,512", help="Comma-separated batch sizes")
+    args = parser.parse_args()
+
+    if args.cold_start:
+        started = time.perf_counter()
+        get_model()
+        loaded = time.perf_counter()
+        get_embedding("running shoes")
+        print(f"[COLD START] import={IMPORT_SECONDS * 1000:.1f} ms  model load={(loaded - started):.2f}s  "
+              f"first query={(time.perf_counter() - loaded) * 1000:.1f} ms")
+    if args.parity:
+        if not parity(args.parity, min_cosine=args.min_cosine):
+            raise SystemExit(1)
+    if args.bench:
+        bench(args.bench.split(","), [int(b) for b in args.batch_sizes.split(",")])
@@ -0,0 +1,82 @@
+import asyncio
+import sys
+import threading
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1] / "src"))
+
+from embedding_server import EmbeddingBatcher  # noqa: E402
+
+
+def _blocking_encoder():
+    release = threading.Event()
+    started = threading.Event()
+
+    def encode(texts):
+        started.set()
+        release.wait(5)
+        return [[float(len(t))] for t in texts]
+
+    return encode, started, release
+
+
+def test_cancelled_submit_does_not_kill_worker():
+    encode, started, release = _blocking_encoder()
+    batcher = EmbeddingBatcher(encode, max_batch=1, max_wait_ms=0)
+    try:
+        first = batcher.submit("a")
+        assert started.wait(5)
+        pending = batcher.submit("bb")  # queued behind the blocked encode
+        assert pending.cancel()
+        release.set()
+        assert first.result(timeout=5) == [1.0]
+        assert batcher.submit("ccc").result(timeout=5) == [3.0]
+        assert batcher._worker.is_alive()
+    finally:
+        batcher.close()
+
+
+def test_wait_for_timeout_then_later_submit_resolves():
+    encode, started, release = _blocking_encoder()
+    batcher = EmbeddingBatcher(encode, max_batch=1, max_wait_ms=0)
+
+    async def search(text, timeout):
+        return await asyncio.wait_for(asyncio.wrap_future(batcher.submit(text)), timeout)
+
+    async def scenario():
+        blocked = asyncio.ensure_future(search("a", 5))
+        await asyncio.to_thread(started.wait, 5)
+        try:
+            await search("bb", 0.05)
+        except asyncio.TimeoutError:
+            pass
+        release.set()
+        assert await blocked == [1.0]
+        return await search("ccc", 5)
+
+    try:
+        assert asyncio.run(scenario()) == [3.0]
+    finally:
+        batcher.close()
+
+
+def test_encode_error_fails_batch_only():
+    calls = []
+
+    def encode(texts):
+        calls.append(texts)
+        if len(calls) == 1:
+            raise RuntimeError("boom")
+        return [[1.0] for _ in texts]
+
+    batcher = EmbeddingBatcher(encode, max_batch=1, max_wait_ms=0)
+    try:
+        failed = batcher.submit("a")
+        try:
+            failed.result(timeout=5)
+            raise AssertionError("expected the encode error")
+        except RuntimeError:
+            pass
+        assert batcher.submit("b").result(timeout=5) == [1.0]
+    finally:
+        batcher.close()
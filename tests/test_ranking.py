@@ -0,0 +1,32 @@
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).resolve().parents[1] / "src"))
+
+from ranking import rerank, synthetic_points  # noqa: E402
+
+# Serving budget is 5 ms p95 for N=1000 (see `python src/ranking.py`); the
+# test allows 10x so it stays stable on slow or shared CI runners.
+BUDGET_MS = 50.0
+
+
+def test_rerank_p95_within_budget_for_1000_candidates():
+    points = synthetic_points(1000)
+    rerank(points, 10)  # warm up
+    latencies = []
+    for _ in range(100):
+        started = time.perf_counter()
+        rerank(points, 10)
+        latencies.append((time.perf_counter() - started) * 1000)
+    p95 = float(np.percentile(latencies, 95))
+    assert p95 < BUDGET_MS, f"rerank p95 {p95:.2f} ms over the {BUDGET_MS} ms budget"
+
+
+def test_rerank_returns_top_k_in_descending_order():
+    ranked = rerank(synthetic_points(1000), 10)
+    assert len(ranked) == 10
+    finals = [final for _, final, _ in ranked]
+    assert finals == sorted(finals, reverse=True)
@@ -0,0 +1,37 @@
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT / "src"))
+
+pytest.importorskip("onnxruntime")
+pytest.importorskip("sentence_transformers")
+
+import vectorize  # noqa: E402
+
+# Fixed sample: the first 256 product texts from the bundled datasets.
+SAMPLE_SIZE = 256
+
+
+@pytest.fixture(scope="module")
+def sample_texts():
+    # _sample_texts reads data/ relative to the working directory.
+    cwd = os.getcwd()
+    os.chdir(ROOT)
+    try:
+        return vectorize._sample_texts(SAMPLE_SIZE)
+    finally:
+        os.chdir(cwd)
+
+
+@pytest.mark.parametrize("backend, min_cosine, min_recall", [
+    ("onnx", 0.99, 0.95),
+    ("onnx-int8", 0.95, 0.80),
+])
+def test_onnx_matches_torch(sample_texts, backend, min_cosine, min_recall):
+    metrics = vectorize.parity_metrics(backend, "torch", sample_texts)
+    assert metrics["min_cosine"] >= min_cosine, metrics
+    assert metrics["recall_at_10"] >= min_recall, metrics
@@ -1,5 +1,8 @@
 const el = (id) => document.getElementById(id);
 
+// Payload fields the result cards render; the API leaves out everything else.
+const RESULT_FIELDS = "name,description,price,category,ar_model_glb,ar_model_usdz";
+
 function formatPrice(value) {
   const n = Number(value);
   if (!Number.isFinite(n)) return "—";
@@ -85,7 +88,7 @@ async function runSearch() {
 
   el("status").textContent = "Searching…";
 
-  const params = new URLSearchParams({ q: query, collection, top_k: String(topk) });
+  const params = new URLSearchParams({ q: query, collection, top_k: String(topk), fields: RESULT_FIELDS });
   let res;
   try {
     res = await fetch(`/api/search?${params.toString()}`);
@@ -127,6 +130,87 @@ async function runSearch() {
   el("results").innerHTML = items.map((it, idx) => renderResultCard(it, idx)).join("\n");
 }
 
+function renderTile(item) {
+  const name = escapeHtml(item?.name ?? "N/A");
+  const desc = escapeHtml(item?.description ?? "");
+  const category = escapeHtml((item?.category ?? "").toString().toUpperCase());
+  const price = formatPrice(item?.price);
+  const arBadge = item?.ar_model_glb
+    ? `<span class="rounded-full border border-emerald-500/30 bg-emerald-500/10 px-2 py-0.5 text-xs font-semibold text-emerald-300">AR</span>`
+    : "";
+
+  return `
+    <article class="rounded-2xl border border-white/10 bg-slate-900/60 p-5 transition hover:border-purple-500/30">
+      <div class="flex items-start justify-between gap-3">
+        <h3 class="text-lg font-bold text-white">${name}</h3>
+        <div class="shrink-0 text-lg font-extrabold text-purple-300">${price}</div>
+      </div>
+      <div class="mt-2 flex items-center gap-2">
+        <span class="rounded-lg border border-white/10 bg-white/5 px-2 py-0.5 text-xs font-bold uppercase tracking-wider text-slate-300">${category || "N/A"}</span>
+        ${arBadge}
+      </div>
+      <p class="mt-3 line-clamp-3 text-sm text-slate-400">${desc}</p>
+    </article>
+  `;
+}
+
+// "All Products": pages come from /api/products and are appended as the
+// sentinel below the grid scrolls into view.
+// `token` changes on every reset so responses to an earlier load are ignored.
+const catalog = { collection: null, token: 0, cursor: null, loading: false, done: false, count: 0 };
+
+function resetCatalog() {
+  catalog.collection = el("collection").value;
+  catalog.token += 1;
+  catalog.cursor = null;
+  catalog.loading = false;
+  catalog.done = false;
+  catalog.count = 0;
+  el("catalog").innerHTML = "";
+  el("catalogStatus").textContent = "";
+  loadCatalogPage();
+}
+
+async function loadCatalogPage() {
+  if (catalog.loading || catalog.done) return;
+  catalog.loading = true;
+  const { collection, token } = catalog;
+  el("catalogStatus").textContent = "Loading…";
+
+  const params = new URLSearchParams({ collection, limit: "24" });
+  if (catalog.cursor) params.set("cursor", catalog.cursor);
+  try {
+    const res = await fetch(`/api/products?${params.toString()}`);
+    if (!res.ok) throw new Error(`HTTP ${res.status}`);
+    const data = await res.json();
+    if (token !== catalog.token) return; // catalog reset mid-request
+
+    const items = Array.isArray(data?.items) ? data.items : [];
+    el("catalog").insertAdjacentHTML("beforeend", items.map(renderTile).join("\n"));
+    catalog.count += items.length;
+    catalog.cursor = data?.next_cursor ?? null;
+    catalog.done = !catalog.cursor;
+    el("catalogStatus").textContent = `${catalog.count} product(s)${catalog.done ? "" : " — scroll for more"}`;
+  } catch (e) {
+    if (token !== catalog.token) return;
+    el("catalogStatus").textContent = "Could not load products.";
+    catalog.done = true;
+  } finally {
+    if (token === catalog.token) catalog.loading = false;
+  }
+  // The observer only fires on changes; keep filling if the sentinel is still on screen.
+  if (!catalog.done && el("catalogSentinel").getBoundingClientRect().top < window.innerHeight + 600) {
+    loadCatalogPage();
+  }
+}
+
+new IntersectionObserver(
+  (entries) => {
+    if (entries.some((entry) => entry.isIntersecting)) loadCatalogPage();
+  },
+  { rootMargin: "600px" }
+).observe(el("catalogSentinel"));
+
 function clearAll() {
   el("query").value = "";
   el("results").innerHTML = "";
@@ -138,3 +222,6 @@ el("clearBtn").addEventListener("click", clearAll);
 el("query").addEventListener("keydown", (e) => {
   if (e.key === "Enter") runSearch();
 });
+el("collection").addEventListener("change", resetCatalog);
+
+resetCatalog();
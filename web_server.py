@@ -1,22 +1,122 @@
 from __future__ import annotations
 
+import time
+
+_STARTED = time.perf_counter()
+
+import asyncio
 import os
 import sys
+import threading
+from contextlib import asynccontextmanager
 from pathlib import Path
-from typing import Any
+from typing import Any, Literal
 
 from fastapi import FastAPI, HTTPException, Query, Request
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, JSONResponse
 from fastapi.staticfiles import StaticFiles
+from pydantic import BaseModel, Field
+from qdrant_client.models import QueryRequest
 
 # Allow importing from ./src
 ROOT = Path(__file__).resolve().parent
 sys.path.append(str(ROOT / "src"))
 
-from qdrant_utils import get_client  # noqa: E402
+from qdrant_utils import (  # noqa: E402
+    get_client, get_async_client, get_data_version, get_search_params, check_health, client_metrics, close_client,
+    close_async_client, is_connection_error, reconnect, reset_async_client,
+)
+from embedding_server import EmbeddingBatcher  # noqa: E402
+from query_cache import get_query_cache, normalize_query  # noqa: E402
+from result_cache import SearchResultCache, result_key  # noqa: E402
+from payload_utils import payload_selector, resolve_ar_urls  # noqa: E402
+from ar_catalog import get_catalog  # noqa: E402
+from search_filters import FilterError, build_filter, filter_key, parse_filter  # noqa: E402
+from ranking import candidate_limit, parse_weights, ranking_payload, rerank  # noqa: E402
+from listing import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, CursorError, encode_cursor, scroll_args  # noqa: E402
+import vectorize  # noqa: E402  (cheap: the model itself loads lazily)
+
+try:
+    import orjson
+except ImportError:  # optional; falls back to the stdlib encoder
+    orjson = None
+
+IMPORT_SECONDS = round(time.perf_counter() - _STARTED, 4)
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSON response encoded with orjson when it is installed. Search endpoints
+    return it directly, which also skips FastAPI's jsonable_encoder pass.
+    """
+
+    def render(self, content: Any) -> bytes:
+        if orjson is not None:
+            return orjson.dumps(content, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+        return super().render(content)
+
+
+@asynccontextmanager
+async def _lifespan(app: FastAPI):
+    # Warm up in the background so startup isn't blocked; release the encoder
+    # thread and both Qdrant clients on shutdown.
+    if WARMUP_ON_STARTUP:
+        threading.Thread(target=_warm_up, name="startup-warmup", daemon=True).start()
+    yield
+    if _batcher is not None:
+        _batcher.close()
+    close_client()
+    await close_async_client()
+
+
+app = FastAPI(title="ArbitrageAI Web", default_response_class=FastJSONResponse, lifespan=_lifespan)
+
+# Compress JSON responses above this size (bytes): brotli when brotli-asgi is
+# installed and the client accepts it, gzip otherwise.
+COMPRESS_MIN_BYTES = int(os.environ.get("COMPRESS_MIN_BYTES", "1024"))
+# 3D assets are already compact binaries and are fetched with range requests;
+# they are served as-is.
+UNCOMPRESSED_PATH_PREFIXES = ("/models/",)
+
 
+class SelectiveCompression:
+    """
+    Runs `compressor` (an ASGI compression middleware) for every HTTP request
+    except paths under UNCOMPRESSED_PATH_PREFIXES, which go straight to the app.
+    """
 
-app = FastAPI(title="ArbitrageAI Web")
+    def __init__(self, app, compressor, **options):
+        self.app = app
+        self.compressed = compressor(app, **options)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["path"].startswith(UNCOMPRESSED_PATH_PREFIXES):
+            await self.app(scope, receive, send)
+        else:
+            await self.compressed(scope, receive, send)
+
+
+try:
+    from brotli_asgi import BrotliMiddleware
+
+    app.add_middleware(SelectiveCompression, compressor=BrotliMiddleware,
+                       minimum_size=COMPRESS_MIN_BYTES, gzip_fallback=True)
+except ImportError:
+    from fastapi.middleware.gzip import GZipMiddleware
+
+    app.add_middleware(SelectiveCompression, compressor=GZipMiddleware,
+                       minimum_size=COMPRESS_MIN_BYTES, compresslevel=6)
+
+# Async search tuning: max searches running at once, how long a request may
+# wait for a slot, and the end-to-end budget per search (seconds).
+SEARCH_MAX_CONCURRENCY = int(os.environ.get("SEARCH_MAX_CONCURRENCY", "256"))
+SEARCH_QUEUE_TIMEOUT = float(os.environ.get("SEARCH_QUEUE_TIMEOUT", "2"))
+SEARCH_TIMEOUT = float(os.environ.get("SEARCH_TIMEOUT", "10"))
+# Limits for POST /api/search/batch.
+SEARCH_BATCH_MAX_QUERIES = int(os.environ.get("SEARCH_BATCH_MAX_QUERIES", "32"))
+SEARCH_BATCH_MAX_COLLECTIONS = int(os.environ.get("SEARCH_BATCH_MAX_COLLECTIONS", "8"))
+# Load the embedding model and connect to Qdrant in the background at startup.
+WARMUP_ON_STARTUP = os.environ.get("WARMUP_ON_STARTUP", "true").lower() in ("1", "true", "yes")
 
 WEB_DIR = ROOT / "web"
 MODELS_DIR = ROOT / "web_models"
@@ -33,74 +133,485 @@ def index():
     return FileResponse(str(index_path))
 
 
-def _get_embedding_func():
-    from vectorize import get_embedding  # local import to avoid slow import at startup
+_batcher: EmbeddingBatcher | None = None
+_batcher_lock = threading.Lock()
+
+
+def _get_batcher() -> EmbeddingBatcher:
+    # Concurrent /api/search requests share one micro-batching encoder.
+    global _batcher
+    if _batcher is None:
+        with _batcher_lock:
+            if _batcher is None:
+                _batcher = EmbeddingBatcher(vectorize.get_embeddings)
+    return _batcher
+
+
+_search_slots: asyncio.Semaphore | None = None
+
 
-    return get_embedding
+def _get_search_slots() -> asyncio.Semaphore:
+    global _search_slots
+    if _search_slots is None:
+        _search_slots = asyncio.Semaphore(SEARCH_MAX_CONCURRENCY)
+    return _search_slots
 
 
-def _normalize_ar_url(request: Request, payload: dict[str, Any]) -> dict[str, Any]:
-    # Always point Nike results to our own hosted model to avoid CORS/mixed-content.
-    name = str(payload.get("name", "")).lower()
-    if "nike" in name:
-        payload["ar_model_glb"] = str(request.base_url).rstrip("/") + "/models/nike_air_max.glb"
-    return payload
+_reconnect_lock: asyncio.Lock | None = None
 
 
-@app.get("/models/nike_air_max.glb")
-def get_nike_model():
-    model_path = MODELS_DIR / "nike_air_max.glb"
-    if not model_path.exists():
+async def _with_reconnect(fn):
+    """
+    await fn(async_client). After a connection error both shared clients are
+    rebuilt (the sync one with backoff until healthy) and fn is retried once.
+    """
+    global _reconnect_lock
+    client = get_async_client()
+    try:
+        return await fn(client)
+    except Exception as e:
+        if not is_connection_error(e):
+            raise
+        print(f"[WARN] Qdrant connection lost ({e}); reconnecting")
+    if _reconnect_lock is None:
+        _reconnect_lock = asyncio.Lock()
+    async with _reconnect_lock:
+        # Requests that failed on the same client reconnect only once.
+        if get_async_client() is client:
+            old = reset_async_client()
+            try:
+                await old.close()
+            except Exception:
+                pass
+            await asyncio.to_thread(reconnect)
+    return await fn(get_async_client())
+
+
+async def _cache_call(cache, fn, *args):
+    # A file-backed query cache reads and commits SQLite on every get/put;
+    # run those on a worker thread so an fsync never stalls the event loop.
+    if cache.persistent:
+        return await asyncio.to_thread(fn, *args)
+    return fn(*args)
+
+
+async def _embed_query(query: str) -> list[float]:
+    # Cache hit: no encode at all. Miss: hand off to the batcher thread and
+    # await its future, so the event loop never runs the model.
+    cache = get_query_cache()
+    vector = await _cache_call(cache, cache.get, query)
+    if vector is None:
+        vector = await asyncio.wrap_future(_get_batcher().submit(normalize_query(query)))
+        await _cache_call(cache, cache.put, query, vector)
+    return vector
+
+
+async def _embed_queries(queries: list[str]) -> list[list[float]]:
+    # Like _embed_query, but every cache miss goes through a single encode call.
+    cache = get_query_cache()
+    vectors = await _cache_call(cache, lambda: [cache.get(q) for q in queries])
+    missing = list(dict.fromkeys(normalize_query(q) for q, v in zip(queries, vectors) if v is None))
+    if missing:
+        fresh = dict(zip(missing, await asyncio.wrap_future(_get_batcher().submit_many(missing))))
+        stored = []
+        for i, q in enumerate(queries):
+            if vectors[i] is None:
+                vectors[i] = fresh[normalize_query(q)]
+                stored.append((q, vectors[i]))
+        await _cache_call(cache, lambda: [cache.put(q, v) for q, v in stored])
+    return vectors
+
+
+_startup = {"ready_after_s": None, "first_query_after_s": None, "warmup": {}}
+
+
+def _require_qdrant():
+    if not check_health():
+        raise ConnectionError("Qdrant health check failed")
+
+
+def _warm_up():
+    # Each step is guarded on its own, so a Qdrant outage doesn't skip the
+    # model load (or vice versa); /api/ready reports what succeeded.
+    steps = {
+        "model": lambda: vectorize.warm_up(background=False),
+        "batcher": _get_batcher,
+        "qdrant": _require_qdrant,
+    }
+    for name, step in steps.items():
+        try:
+            step()
+            _startup["warmup"][name] = "ok"
+        except Exception as e:
+            _startup["warmup"][name] = f"failed: {e}"
+            print(f"[WARN] Warm-up step '{name}' failed: {e}")
+    if vectorize.is_ready() and _startup["warmup"].get("qdrant") == "ok":
+        _startup["ready_after_s"] = round(time.perf_counter() - _STARTED, 3)
+        print(f"[INFO] Ready {_startup['ready_after_s']}s after start (import {IMPORT_SECONDS}s)")
+
+
+def _normalize_ar_url(base_url: str, payload: dict[str, Any]) -> dict[str, Any]:
+    # Payloads store asset keys; serve them from our own /models route to avoid CORS/mixed-content.
+    glb = str(payload.get("ar_model_glb") or "")
+    if glb.startswith("http"):
+        # Older payloads baked in the ingest machine's LAN URL; re-derive the asset from the catalog.
+        asset = get_catalog().match(payload.get("name", "")) or {}
+        payload["ar_model_glb"] = asset.get("glb", payload["ar_model_glb"])
+        payload["ar_model_usdz"] = asset.get("usdz", payload.get("ar_model_usdz"))
+    return resolve_ar_urls(payload, base_url.rstrip("/") + "/models")
+
+
+# Whole /api/search responses, invalidated when a collection's data version changes.
+_result_cache = SearchResultCache(lambda collection: get_data_version(get_client(), collection))
+
+
+_MODEL_MEDIA_TYPES = {".glb": "model/gltf-binary", ".usdz": "model/vnd.usdz+zip"}
+
+
+@app.get("/models/{asset}")
+def get_model(asset: str):
+    model_path = (MODELS_DIR / asset).resolve()
+    media_type = _MODEL_MEDIA_TYPES.get(model_path.suffix.lower())
+    if model_path.parent != MODELS_DIR.resolve() or media_type is None or not model_path.exists():
         raise HTTPException(status_code=404, detail="Model file not found")
 
     return FileResponse(
         str(model_path),
-        filename="nike_air_max.glb",
-        media_type="model/gltf-binary",
+        filename=model_path.name,
+        media_type=media_type,
     )
 
 
 @app.get("/api/search")
-def api_search(
+async def api_search(
     request: Request,
     q: str = Query(..., min_length=1),
     collection: str = Query("nike_shoes"),
     top_k: int = Query(5, ge=1, le=20),
+    filters: str | None = Query(None, alias="filter", description='e.g. "category=shoes|boots, price<=200, roi>0.1"'),
+    fields: str | None = Query(None, description='Payload projection: "name,price" or "-history,-image_embedding"'),
+    investment_mode: bool = Query(False, description="Rerank candidates by semantic + investment score"),
+    weights: str | None = Query(None, description='Investment weights, e.g. "roi=0.6,liquidity=0.3,volatility=-0.1"'),
 ):
     query = q.strip()
     if not query:
         raise HTTPException(status_code=400, detail="Empty query")
+    try:
+        spec = parse_filter(filters) if filters else {}
+        with_payload = payload_selector(fields)
+        weights = parse_weights(weights) if weights else None
+    except (FilterError, ValueError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    slots = _get_search_slots()
+    try:
+        await asyncio.wait_for(slots.acquire(), timeout=SEARCH_QUEUE_TIMEOUT)
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=503, detail="Search is overloaded, try again")
 
+    base_url = str(request.base_url)
     try:
-        client = get_client()
-        get_embedding = _get_embedding_func()
-        vector = get_embedding(query)
+        ranking = (investment_mode, tuple(sorted(weights.items())) if weights else None)
+        key = result_key(query, collection, top_k, filters=filter_key(spec), extra=(base_url, fields or "", ranking))
+        payloads = await asyncio.wait_for(
+            _result_cache.aget_or_compute(
+                key, lambda: _search(query, collection, top_k, base_url, spec, with_payload, investment_mode, weights),
+            ),
+            timeout=SEARCH_TIMEOUT,
+        )
+        if _startup["first_query_after_s"] is None:
+            _startup["first_query_after_s"] = round(time.perf_counter() - _STARTED, 3)
+        return FastJSONResponse({"results": payloads})
 
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=504, detail="Search timed out")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        slots.release()
+
+
+async def _search(query: str, collection: str, top_k: int, base_url: str, spec: dict = None,
+                  with_payload=True, investment_mode: bool = False, weights: dict = None) -> list[dict[str, Any]]:
+    """
+    In investment mode candidate_limit() hits are fetched and reranked down
+    to top_k by ranking.rerank (`weights` overrides INVESTMENT_WEIGHTS).
+    """
+    vector = await _embed_query(query)
+    query_filter = build_filter(spec)
+    limit = top_k
+    requested_fields = with_payload if isinstance(with_payload, list) else None
+    if investment_mode:
+        limit = candidate_limit(top_k)
+        with_payload = ranking_payload(with_payload, weights)
+
+    async def run(client):
+        params = await asyncio.to_thread(get_search_params, get_client(), collection)
         # qdrant-client 1.16+ removed search(); use query_points().
         if hasattr(client, "search"):
-            results = client.search(collection_name=collection, query_vector=vector, limit=top_k)
-        else:
-            results = client.query_points(
-                collection_name=collection,
-                query=vector,
-                limit=top_k,
-                with_payload=True,
-            ).points
-        payloads: list[dict[str, Any]] = []
+            return await client.search(
+                collection_name=collection, query_vector=vector, limit=limit, query_filter=query_filter,
+                search_params=params, with_payload=with_payload,
+            )
+        return (await client.query_points(
+            collection_name=collection,
+            query=vector,
+            limit=limit,
+            query_filter=query_filter,
+            with_payload=with_payload,
+            search_params=params,
+        )).points
+
+    results = await _with_reconnect(run)
+    payloads: list[dict[str, Any]] = []
+
+    if investment_mode:
+        ranked = rerank(results, top_k, weights)  # ~1 ms at 1000 candidates, fine on the loop
+        for r, score, investment_score in ranked:
+            payload = dict(r.payload or {})
+            if requested_fields is not None:  # drop the fields only fetched for scoring
+                payload = {k: v for k, v in payload.items() if k in requested_fields}
+            payload = _normalize_ar_url(base_url, payload)
+            payloads.append({**payload, "score": score, "investment_score": investment_score})
+        return payloads
+
+    for r in results:
+        payload = dict(getattr(r, "payload", {}) or {})
+        payload = _normalize_ar_url(base_url, payload)
+        payloads.append(payload)
+
+    return payloads
+
+
+class BatchSearchRequest(BaseModel):
+    queries: list[str] = Field(..., min_length=1)
+    collections: list[str] = Field(default_factory=lambda: ["nike_shoes"], min_length=1)
+    top_k: int = Field(5, ge=1, le=20)
+    filter: str | None = None
+    # Payload projection, same syntax as /api/search?fields=
+    fields: str | None = None
+    # none merges on raw cosine scores, which are comparable because every
+    # collection uses the same embedding model. minmax rescales each
+    # collection's hits to [0, 1] first (opt-in, e.g. for mixed models).
+    normalize: Literal["none", "minmax"] = "none"
+
+
+def _merge_hits(hits_by_collection: dict[str, list], top_k: int, normalize: str) -> list[tuple[str, float, float, Any]]:
+    """
+    Merge one query's hits from several collections into a single top_k list
+    of (collection, score, normalized score, point). With "minmax" each
+    collection's best hit becomes 1.0, so a collection with nothing relevant
+    still reaches the top; only use it when raw scores aren't comparable.
+    """
+    merged = []
+    for collection, points in hits_by_collection.items():
+        scores = [p.score for p in points]
+        lo, hi = (min(scores), max(scores)) if scores else (0.0, 0.0)
+        for p in points:
+            if normalize == "minmax":
+                norm = (p.score - lo) / (hi - lo) if hi > lo else 1.0
+            else:
+                norm = p.score
+            merged.append((collection, p.score, norm, p))
+    merged.sort(key=lambda m: (m[2], m[1]), reverse=True)
+    return merged[:top_k]
+
+
+@app.post("/api/search/batch")
+async def api_search_batch(request: Request, body: BatchSearchRequest):
+    """
+    Many queries across many collections: one encode for all queries and
+    one query_batch_points per collection, sent concurrently, so latency is
+    about one Qdrant round trip whatever the fan-out.
+    """
+    queries = [q.strip() for q in body.queries]
+    if not all(queries):
+        raise HTTPException(status_code=400, detail="Empty query")
+    collections = list(dict.fromkeys(body.collections))
+    if len(queries) > SEARCH_BATCH_MAX_QUERIES or len(collections) > SEARCH_BATCH_MAX_COLLECTIONS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {SEARCH_BATCH_MAX_QUERIES} queries and {SEARCH_BATCH_MAX_COLLECTIONS} collections",
+        )
+    try:
+        query_filter = build_filter(parse_filter(body.filter)) if body.filter else None
+        with_payload = payload_selector(body.fields)
+    except (FilterError, ValueError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    slots = _get_search_slots()
+    try:
+        await asyncio.wait_for(slots.acquire(), timeout=SEARCH_QUEUE_TIMEOUT)
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=503, detail="Search is overloaded, try again")
+
+    base_url = str(request.base_url)
+    try:
+        responses = await asyncio.wait_for(
+            _search_batch(queries, collections, body.top_k, query_filter, with_payload), timeout=SEARCH_TIMEOUT,
+        )
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=504, detail="Search timed out")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        slots.release()
+
+    results = []
+    for i, query in enumerate(queries):
+        hits = _merge_hits({c: responses[c][i].points for c in collections}, body.top_k, body.normalize)
+        items = []
+        for collection, score, norm, point in hits:
+            payload = _normalize_ar_url(base_url, dict(point.payload or {}))
+            items.append({**payload, "collection": collection, "score": score, "normalized_score": norm})
+        results.append({"query": query, "results": items})
+    return FastJSONResponse({"results": results})
 
-        for r in results:
-            payload = dict(getattr(r, "payload", {}) or {})
-            payload = _normalize_ar_url(request, payload)
-            payloads.append(payload)
 
-        return {"results": payloads}
+async def _search_batch(queries: list[str], collections: list[str], top_k: int, query_filter,
+                        with_payload=True) -> dict[str, list]:
+    vectors = await _embed_queries(queries)
 
+    async def run(client):
+        params = await asyncio.gather(*(asyncio.to_thread(get_search_params, get_client(), c) for c in collections))
+
+        async def one(collection: str, search_params):
+            requests = [
+                QueryRequest(query=vector, limit=top_k, filter=query_filter, params=search_params,
+                             with_payload=with_payload)
+                for vector in vectors
+            ]
+            return await client.query_batch_points(collection_name=collection, requests=requests)
+
+        return await asyncio.gather(*(one(c, p) for c, p in zip(collections, params)))
+
+    responses = await _with_reconnect(run)
+    return dict(zip(collections, responses))
+
+
+@app.get("/api/products")
+async def api_products(
+    request: Request,
+    collection: str = Query("nike_shoes"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: str | None = Query(None),
+    filters: str | None = Query(None, alias="filter"),
+):
+    """
+    One page of product tiles; pass `next_cursor` back as `cursor` for the next page.
+    """
+    try:
+        args = scroll_args(collection, limit, cursor, build_filter(parse_filter(filters)) if filters else None)
+    except (CursorError, FilterError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    try:
+        points, next_offset = await _with_reconnect(lambda client: client.scroll(**args))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    base_url = str(request.base_url)
+    return FastJSONResponse({
+        "items": [_normalize_ar_url(base_url, dict(p.payload or {})) for p in points],
+        "next_cursor": encode_cursor(collection, next_offset),
+    })
+
+
+@app.get("/api/metrics")
+def api_metrics():
+    return {
+        "embedding": _batcher.metrics() if _batcher is not None else None,
+        "query_cache": get_query_cache().stats(),
+        "result_cache": _result_cache.stats(),
+        "qdrant": client_metrics(),
+    }
+
+
+@app.get("/api/health")
+def api_health():
+    healthy = check_health()
+    if not healthy:
+        raise HTTPException(status_code=503, detail="Qdrant unreachable")
+    return {"qdrant": "ok", "latency_ms": client_metrics()["last_health_ms"]}
+
+
+@app.get("/api/ready")
+def api_ready():
+    """
+    200 once the embedding model is loaded and Qdrant answers; 503 while warming up.
+    """
+    qdrant_ok = check_health()
+    status = {
+        "ready": vectorize.is_ready() and qdrant_ok,
+        "model": vectorize.model_status(),
+        "qdrant": "ok" if qdrant_ok else "unavailable",
+        "import_s": IMPORT_SECONDS,
+        **_startup,
+    }
+    if not status["ready"]:
+        raise HTTPException(status_code=503, detail=status)
+    return status
+
+
+def bench_responses(top_k: int = 20, repeat: int = 500):
+    """
+    Encode time and wire size of a /api/search body: full payload vs the
+    fields the UI renders, stdlib json (with jsonable_encoder) vs orjson.
+    """
+    import gzip
+    import json
+
+    import numpy as np
+    from fastapi.encoders import jsonable_encoder
+
+    rng = np.random.default_rng(0)
+
+    def hit(i: int, projected: bool) -> dict:
+        payload = {
+            "name": f"Product {i}", "description": "Lightweight running shoe with a knit upper. " * 4,
+            "price": float(rng.uniform(50, 400)), "category": "shoes",
+            "ar_model_glb": f"/models/product_{i}.glb", "ar_model_usdz": f"/models/product_{i}.usdz",
+        }
+        if not projected:
+            # What a stored point carries beyond the card: market history and an image embedding.
+            payload.update(
+                price_history=rng.uniform(50, 400, 365).round(2).tolist(),
+                volume_history=rng.integers(0, 500, 365).tolist(),
+                image_embedding=rng.standard_normal(512).astype(np.float32).tolist(),
+                roi=0.12, liquidity=0.8, volatility=0.3,
+            )
+        return {"id": i, "score": float(rng.uniform()), "payload": payload}
+
+    encoders = {"json": lambda body: json.dumps(jsonable_encoder(body)).encode()}
+    if orjson is not None:
+        encoders["orjson"] = lambda body: FastJSONResponse(body).body
+    try:
+        import brotli
+    except ImportError:
+        brotli = None
+
+    for projected in (False, True):
+        body = {"query": "running shoes", "collection": "nike_shoes", "results": [hit(i, projected) for i in range(top_k)]}
+        for name, encode in encoders.items():
+            started = time.perf_counter()
+            for _ in range(repeat):
+                raw = encode(body)
+            us = (time.perf_counter() - started) / repeat * 1e6
+            sizes = f"raw={len(raw) / 1024:8.1f} KiB  gzip={len(gzip.compress(raw, 6)) / 1024:7.1f} KiB"
+            if brotli is not None:
+                sizes += f"  br={len(brotli.compress(raw, quality=4)) / 1024:7.1f} KiB"
+            print(f"[BENCH] {'fields' if projected else 'full':<6} {name:<6} {us:9.1f} us/response  {sizes}")
 
 
 if __name__ == "__main__":
-    import uvicorn
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--bench", action="store_true", help="Benchmark response encoding instead of serving")
+    parser.add_argument("--top_k", type=int, default=20, help="Hits per benchmarked response")
+    args = parser.parse_args()
+    if args.bench:
+        bench_responses(args.top_k)
+    else:
+        import uvicorn
 
-    port = int(os.environ.get("PORT", "8080"))
-    uvicorn.run("web_server:app", host="0.0.0.0", port=port, reload=True)
+        port = int(os.environ.get("PORT", "8080"))
+        uvicorn.run("web_server:app", host="0.0.0.0", port=port, reload=True)